@@ -0,0 +1,5 @@
+"""
+Balatro early-game simulation.
+Importing the package is cheap: only the standard library is used by the game and the
+runner, and analysis dependencies (numpy, matplotlib) are imported by the modules that need them.
+"""
@@ -0,0 +1,248 @@
+import argparse
+import os
+
+# Command line entry point: python -m Simulation <command> (or `balatrosim` once installed).
+# Every command imports what it needs when it runs, so starting a worker only loads the game.
+
+def cmd_run(args):
+    from .runner import run, run_chunk, save_sketch
+
+    best_plays = None
+    if args.memo:
+        from . import memo
+        # Enabled (and warmed up) before the pool starts, so forked workers share the entries read-only
+        best_plays = memo.enable(path=args.memo)
+        if args.memo_warmup:
+            run_chunk((args.strategy, args.start, args.start + args.memo_warmup, None, args.modifiers))
+
+    def report(sketch, games):
+        if not args.quiet:
+            won = sketch.metrics["Won"].moments
+            print(f"{games}/{args.iterations} games, win rate so far {won.mean:.3f}")
+
+    sketch = run(args.strategy, args.iterations, args.start, args.workers, args.chunk_size, report, args.columns,
+                 args.modifiers)
+    os.makedirs(args.out, exist_ok=True)
+    save_sketch(sketch, os.path.join(args.out, f"{args.strategy}_sketch.json"))
+    if best_plays is not None:
+        # Workers send their lookups and new entries back with every chunk, so this covers the whole run
+        stats = best_plays.stats()
+        print(f"Best-play cache: {stats['entries']} entries, hit rate {stats['hit_rate']:.3f}")
+        best_plays.save(args.memo)
+
+def cmd_stats(args):
+    from .runner import load_result_sketches, format_summary
+    print(format_summary(load_result_sketches(args.results)))
+
+def cmd_compare(args):
+    from .bootstrap import format_comparison, load_result_columns, paired_array, paired_bootstrap
+    try:
+        names, data = paired_array(load_result_columns(args.results, args.columns))
+        results = paired_bootstrap(names, data, args.resamples, args.alpha, args.power, args.seed)
+    except ValueError as error:
+        raise SystemExit(f"compare: {error}")
+    print(f"Paired bootstrap over {data.shape[2]} common seeds, {args.resamples} resamples")
+    print(format_comparison(results, args.alpha))
+
+def cmd_plot(args):
+    from .runner import load_result_sketches
+    from .plots import plot_boxplots
+    n_columns = plot_boxplots(load_result_sketches(args.results), args.out)
+    print(f"Generated {n_columns} boxplots, saved in the '{args.out}' directory")
+
+def cmd_survival(args):
+    from .fullrun import ANTE_TARGETS, blind_schedule, format_survival, survival
+
+    schedule = blind_schedule(ANTE_TARGETS[:args.antes], scale=args.scale)
+    curves = []
+    for key in args.strategies:
+        records = os.path.join(args.records, f"{key}_rounds.csv") if args.records else None
+        if records:
+            os.makedirs(args.records, exist_ok=True)
+        curves.append(survival(key, args.runs, args.start, schedule, args.workers, args.chunk_size, args.modifiers, records))
+    print(format_survival(curves))
+
+def cmd_tune(args):
+    from .tuning import PARAM_SPACES, grid_candidates, random_candidates, tune
+
+    space = PARAM_SPACES[args.strategy]
+    candidates = random_candidates(space, args.candidates, args.start) if args.search == "random" else grid_candidates(space)
+
+    def report(r, alive):
+        best = max(alive, key=lambda result: result["win_rate"])
+        print(f"round {r + 1}: {len(alive)} candidates, best win rate {best['win_rate']:.3f} with {best['params']}")
+
+    results = tune(args.strategy, candidates, args.block_size, args.rounds, args.eta, args.workers,
+                   target=args.target, start_seed=args.start, progress=report)
+    for result in results[:args.top]:
+        print(f"{result['win_rate']:.3f} [{result['ci_low']:.3f}, {result['ci_high']:.3f}] "
+              f"over {result['games']} games: {result['params']}")
+
+def cmd_coordinate(args):
+    from .distributed import Coordinator, run_local
+    from .runner import save_sketch
+
+    def report(sketch, games):
+        if not args.quiet:
+            print(f"{games}/{args.iterations} games, win rate so far {sketch.metrics['Won'].moments.mean:.3f}")
+
+    if args.local_workers:
+        sketch = run_local(args.strategy, args.iterations, args.local_workers, args.start, args.chunk_size,
+                           args.lease_timeout, report)
+    else:
+        coordinator = Coordinator(args.strategy, args.iterations, args.start, args.chunk_size, args.host,
+                                  args.port, args.lease_timeout, report)
+        print(f"Coordinator listening on {coordinator.address[0]}:{coordinator.address[1]}")
+        sketch = coordinator.serve()
+    os.makedirs(args.out, exist_ok=True)
+    save_sketch(sketch, os.path.join(args.out, f"{args.strategy}_sketch.json"))
+
+def cmd_work(args):
+    from .distributed import work
+    played = work(args.host, args.port, retry_for=args.retry_for)
+    print(f"Played {played} games")
+
+def cmd_estimate(args):
+    from .sampling import importance_estimate, stratified_estimate, tilted_estimate
+
+    if args.method == "tilt":
+        result = tilted_estimate(args.strategy, args.games, args.target, args.tilt_weight, args.tilt_draws, seed=args.seed,
+                                 workers=args.workers)
+    elif args.method == "importance":
+        result = importance_estimate(args.strategy, args.games, args.classes, args.target, seed=args.seed, workers=args.workers)
+    else:
+        result = stratified_estimate(args.strategy, args.games, args.classes, args.target, args.method, seed=args.seed,
+                                     workers=args.workers)
+    print(f"P(score >= {args.target}) = {result['estimate']:.5f} +/- {result['std_error']:.5f} "
+          f"(variance {result['variance']:.3g}, {result['games']} games + {result['pilot_games']} pilot games)")
+    print(f"Plain Monte Carlo with {result['total_games']} games: +/- {result['plain_std_error']:.5f} "
+          f"(efficiency {result['efficiency']:.2f})")
+
+def cmd_serve(args):
+    from .service import serve
+    serve(args.host, args.port, args.max_batch, args.max_wait_ms)
+
+def cmd_loadtest(args):
+    import json
+    from .service import run_load_test
+    result = run_load_test(args.host, args.port, args.local, requests=args.requests, concurrency=args.concurrency,
+                           distinct=args.distinct, rollouts=args.rollouts)
+    print(json.dumps(result, indent=2))
+
+def build_parser():
+    # Choices are listed here rather than read from runner.STRATEGIES to keep --help import-free
+    parser = argparse.ArgumentParser(prog="balatrosim", description="Simulate early-game Balatro strategies")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="play seeded games and save sketches of the results")
+    run.add_argument("strategy", choices=["flush", "straight", "full_house", "rollout"])
+    run.add_argument("iterations", type=int)
+    run.add_argument("--start", type=int, default=0, help="first seed")
+    run.add_argument("--workers", type=int, default=1)
+    run.add_argument("--chunk-size", type=int, default=250)
+    run.add_argument("--out", default="Results")
+    run.add_argument("--columns", help="also write every game's results to this folder, for compare")
+    run.add_argument("--modifiers", nargs="+", metavar="JOKER", help="jokers active in every game, e.g. joker greedy scholar")
+    run.add_argument("--memo", metavar="FILE", help="cache best plays by canonical hand, loaded from and saved to FILE")
+    run.add_argument("--memo-warmup", type=int, default=0, metavar="N",
+                     help="fill the cache with the first N games in this process before starting the workers")
+    run.add_argument("--quiet", action="store_true")
+    run.set_defaults(func=cmd_run)
+
+    stats = commands.add_parser("stats", help="print summary statistics of saved results")
+    stats.add_argument("--results", default="Results")
+    stats.set_defaults(func=cmd_stats)
+
+    compare = commands.add_parser("compare", help="paired bootstrap intervals and required games for every pair of strategies")
+    compare.add_argument("--results", default="Results", help="folder of results CSVs")
+    compare.add_argument("--columns", help="folder written by run --columns; preferred over the CSVs")
+    compare.add_argument("--resamples", type=int, default=2000)
+    compare.add_argument("--alpha", type=float, default=0.05)
+    compare.add_argument("--power", type=float, default=0.8)
+    compare.add_argument("--seed", type=int, default=0)
+    compare.set_defaults(func=cmd_compare)
+
+    plot = commands.add_parser("plot", help="draw boxplots of saved results")
+    plot.add_argument("--results", default="Results")
+    plot.add_argument("--out", default=os.path.join("Analysis", "Plots"))
+    plot.set_defaults(func=cmd_plot)
+    coordinate = commands.add_parser("coordinate", help="hand out seed chunks to workers on other hosts")
+    coordinate.add_argument("strategy", choices=["flush", "straight", "full_house", "rollout"])
+    coordinate.add_argument("iterations", type=int)
+    coordinate.add_argument("--start", type=int, default=0, help="first seed")
+    coordinate.add_argument("--chunk-size", type=int, default=250)
+    coordinate.add_argument("--host", default="0.0.0.0")
+    coordinate.add_argument("--port", type=int, default=5784)
+    coordinate.add_argument("--lease-timeout", type=float, default=300, help="seconds before an unreturned chunk is reassigned")
+    coordinate.add_argument("--local-workers", type=int, default=0, help="run this many workers on localhost instead")
+    coordinate.add_argument("--out", default="Results")
+    coordinate.add_argument("--quiet", action="store_true")
+    coordinate.set_defaults(func=cmd_coordinate)
+
+    work = commands.add_parser("work", help="play seed chunks for a coordinator")
+    work.add_argument("host")
+    work.add_argument("--port", type=int, default=5784)
+    work.add_argument("--retry-for", type=float, default=30, help="seconds to keep trying to connect")
+    work.set_defaults(func=cmd_work)
+
+    estimate = commands.add_parser("estimate", help="estimate a (rare) win probability with stratified or importance sampling")
+    estimate.add_argument("strategy", choices=["flush", "straight", "full_house"])
+    estimate.add_argument("--games", type=int, default=2000)
+    estimate.add_argument("--target", type=int, default=600)
+    estimate.add_argument("--method", choices=["neyman", "proportional", "importance", "tilt"], default="neyman")
+    estimate.add_argument("--classes", choices=["suits", "ranks"], default="suits", help="opening-hand profile to stratify on")
+    estimate.add_argument("--tilt-weight", type=float, default=2.0, help="tilt: weight of the favoured cards in each draw")
+    estimate.add_argument("--tilt-draws", type=int, default=12, help="tilt: number of draws that are tilted")
+    estimate.add_argument("--seed", type=int, default=0)
+    estimate.add_argument("--workers", type=int, default=1)
+    estimate.set_defaults(func=cmd_estimate)
+
+    runs = commands.add_parser("survival", help="play whole runs of rising blinds and report survival by ante")
+    runs.add_argument("strategies", nargs="+", choices=["flush", "straight", "full_house", "rollout"])
+    runs.add_argument("--runs", type=int, default=1000)
+    runs.add_argument("--start", type=int, default=0, help="first run seed")
+    runs.add_argument("--antes", type=int, default=8)
+    runs.add_argument("--scale", type=float, default=1.0, help="multiplies every blind target")
+    runs.add_argument("--modifiers", nargs="+", metavar="JOKER", help="jokers active for the whole run")
+    runs.add_argument("--workers", type=int, default=1)
+    runs.add_argument("--chunk-size", type=int, default=100)
+    runs.add_argument("--records", help="folder to stream every blind's record to, as <strategy>_rounds.csv")
+    runs.set_defaults(func=cmd_survival)
+
+    serve = commands.add_parser("serve", help="answer hand/discard advice requests over HTTP (POST /advise, GET /metrics)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--max-batch", type=int, default=8, help="most requests evaluated together")
+    serve.add_argument("--max-wait-ms", type=float, default=5.0, help="how long a batch waits for more requests")
+    serve.set_defaults(func=cmd_serve)
+
+    loadtest = commands.add_parser("loadtest", help="send concurrent advice requests and report latency and throughput")
+    loadtest.add_argument("--host", default="127.0.0.1")
+    loadtest.add_argument("--port", type=int, default=8765)
+    loadtest.add_argument("--local", action="store_true", help="start a service in this process and test that")
+    loadtest.add_argument("--requests", type=int, default=500)
+    loadtest.add_argument("--concurrency", type=int, default=32)
+    loadtest.add_argument("--distinct", type=int, default=100, help="number of different positions sent")
+    loadtest.add_argument("--rollouts", type=int, default=100, help="rollouts per strategy and position")
+    loadtest.set_defaults(func=cmd_loadtest)
+
+    tune = commands.add_parser("tune", help="race parameter sets of a heuristic strategy")
+    tune.add_argument("strategy", choices=["flush", "straight", "full_house"])
+    tune.add_argument("--search", choices=["grid", "random"], default="grid")
+    tune.add_argument("--candidates", type=int, default=10, help="number of random candidates")
+    tune.add_argument("--block-size", type=int, default=200, help="seeds in the first round")
+    tune.add_argument("--rounds", type=int, default=4)
+    tune.add_argument("--eta", type=int, default=2, help="keep 1/eta of the candidates each round")
+    tune.add_argument("--workers", type=int, default=1)
+    tune.add_argument("--target", type=int, default=600)
+    tune.add_argument("--start", type=int, default=0, help="first seed")
+    tune.add_argument("--top", type=int, default=5)
+    tune.set_defaults(func=cmd_tune)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
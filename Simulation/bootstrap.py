@@ -0,0 +1,153 @@
+import csv
+import itertools
+import math
+import os
+from array import array
+from statistics import NormalDist
+
+try:
+    from .runner import METRICS, strategy_label
+except ImportError: # running from inside the Simulation folder
+    from runner import METRICS, strategy_label
+
+# Paired comparison of strategies without t-test assumptions.
+# Every strategy plays the same seeds, so game i of one strategy is paired with game i of
+# another. The bootstrap resamples seeds: one draw of resampling weights is applied to every
+# strategy and metric at once, as a single matrix product, which keeps the pairing and makes
+# the cost one pass over the data per block of resamples, however many pairs and metrics there are.
+# Won and Target_hand_ratio are binary or bounded, so percentile intervals of the resampled
+# mean differences are used rather than t-test p-values.
+# numpy is imported inside the functions so the game itself keeps running on the standard library.
+
+def _read_chunk(path):
+    """(seeds, rows) of one columnar chunk written by runner.write_columns"""
+    import numpy as np
+    data = np.fromfile(path, dtype=np.float64)
+    columns = data.reshape(1 + len(METRICS), -1)
+    return columns[0].astype(np.int64), columns[1:]
+
+def load_columns(columns_dir, key):
+    """Seeds and a (metrics x games) array of one strategy, read chunk by chunk from its folder"""
+    import numpy as np
+    folder = os.path.join(columns_dir, key)
+    chunks = [_read_chunk(os.path.join(folder, f)) for f in sorted(os.listdir(folder)) if f.endswith(".f64")]
+    if not chunks:
+        return np.zeros(0, dtype=np.int64), np.zeros((len(METRICS), 0))
+    return np.concatenate([seeds for seeds, _ in chunks]), np.concatenate([rows for _, rows in chunks], axis=1)
+
+def columns_from_csv(path):
+    """Same as load_columns for a results CSV saved by the notebooks, where row i is seed i"""
+    import numpy as np
+    columns = [array('d') for _ in METRICS]
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            for column, metric in zip(columns, METRICS):
+                column.append(float(row[metric]))
+    rows = np.array([np.frombuffer(column, dtype=np.float64) for column in columns])
+    return np.arange(rows.shape[1]), rows
+
+def load_result_columns(result_paths, columns_dir=None):
+    """
+    Per-game results of every strategy, by label: {strategy: (seeds, rows)}.
+    Columnar runs in columns_dir take precedence over CSVs of the same strategy.
+    """
+    all_columns = {}
+    if columns_dir and os.path.isdir(columns_dir):
+        for key in sorted(os.listdir(columns_dir)):
+            if os.path.isdir(os.path.join(columns_dir, key)):
+                all_columns[strategy_label(key)] = load_columns(columns_dir, key)
+    if result_paths and os.path.isdir(result_paths):
+        for file in sorted(f for f in os.listdir(result_paths) if f.endswith('.csv')):
+            strategy_name = strategy_label(os.path.splitext(file)[0]).replace(' Df', '')
+            if strategy_name not in all_columns:
+                all_columns[strategy_name] = columns_from_csv(os.path.join(result_paths, file))
+    return all_columns
+
+def paired_array(all_columns):
+    """
+    Strategy names and a (strategies x metrics x games) array restricted to the seeds every
+    strategy played, in seed order
+    """
+    import numpy as np
+    names = sorted(all_columns)
+    if len(names) < 2:
+        raise ValueError(f"need results of at least two strategies to compare, found {names or 'none'}")
+    common = None
+    for seeds, _ in all_columns.values():
+        common = seeds if common is None else np.intersect1d(common, seeds)
+    if len(common) == 0:
+        raise ValueError("the strategies have no seeds in common, so no games can be paired")
+    data = np.empty((len(names), len(METRICS), len(common)))
+    for s, name in enumerate(names):
+        seeds, rows = all_columns[name]
+        # Duplicate seeds (e.g. a chunk that was run twice) give the same game; keep the first
+        _, first = np.unique(seeds, return_index=True)
+        position = first[np.searchsorted(seeds[first], common)]
+        data[s] = rows[:, position]
+    return names, data
+
+# Most resampling weights held in memory at once (8 bytes each), whatever the number of games
+BLOCK_ELEMENTS = 1 << 23
+
+def paired_bootstrap(names, data, n_boot=2000, alpha=0.05, power=0.8, seed=0, block=None):
+    """
+    Bootstrap comparison of every pair of strategies on every metric.
+    data is the (strategies x metrics x games) array of paired_array. Returns one dict per
+    (pair, metric) with the mean difference (first minus second), its bootstrap standard error,
+    percentile confidence interval and two-sided p-value, and the number of paired games needed
+    to detect a difference of this size with the given power.
+    block: resamples drawn at once; by default as many as keep the weights within BLOCK_ELEMENTS.
+    """
+    import numpy as np
+    n_strategies, n_metrics, n = data.shape
+    if n < 2:
+        raise ValueError("need at least two paired games")
+    if n_strategies < 2:
+        raise ValueError("need at least two strategies to compare")
+    pairs = list(itertools.combinations(range(n_strategies), 2))
+    first = np.array([a for a, _ in pairs], dtype=int)
+    second = np.array([b for _, b in pairs], dtype=int)
+    block = block or max(1, BLOCK_ELEMENTS // n)
+
+    flat = data.reshape(n_strategies * n_metrics, n)
+    rng = np.random.default_rng(seed)
+    boot = np.empty((n_boot, len(pairs), n_metrics))
+    for lo in range(0, n_boot, block):
+        size = min(block, n_boot - lo)
+        # Resampling n seeds with replacement = multinomial counts of how often each seed is drawn
+        weights = rng.multinomial(n, np.full(n, 1.0 / n), size=size).astype(np.float64)
+        means = (weights @ flat.T / n).reshape(size, n_strategies, n_metrics)
+        boot[lo:lo + size] = means[:, first] - means[:, second]
+
+    observed = data.mean(axis=2)
+    difference = observed[first] - observed[second]
+    std_error = boot.std(axis=0, ddof=1)
+    low, high = np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+    # Two-sided p-value of "no difference": how often the resampled difference, centered on
+    # the observed one, lands at least as far from it as the observed difference is from zero
+    p_value = (np.abs(boot - difference) >= np.abs(difference)).mean(axis=0)
+
+    # Games needed for a two-sided test at alpha to reach the given power, from the bootstrap
+    # standard error scaled to one game (normal approximation)
+    z = NormalDist().inv_cdf(1 - alpha / 2) + NormalDist().inv_cdf(power)
+    results = []
+    for p, (a, b) in enumerate(pairs):
+        for m, metric in enumerate(METRICS):
+            d, se = difference[p, m], std_error[p, m]
+            required = math.ceil(n * (z * se / abs(d)) ** 2) if d != 0 else math.inf
+            results.append({"first": names[a], "second": names[b], "metric": metric, "games": n,
+                            "difference": float(d), "std_error": float(se), "ci_low": float(low[p, m]),
+                            "ci_high": float(high[p, m]), "p_value": float(p_value[p, m]),
+                            "required_games": required})
+    return results
+
+def format_comparison(results, alpha=0.05):
+    """Text table of paired_bootstrap results"""
+    level = f"{100 * (1 - alpha):g}% CI"
+    lines = [f"{'Comparison':<26}{'Metric':<20}{'diff':>10}{level:>22}{'p':>8}{'games needed':>14}"]
+    for r in results:
+        interval = f"[{r['ci_low']:.3f}, {r['ci_high']:.3f}]"
+        required = "-" if math.isinf(r["required_games"]) else r["required_games"]
+        lines.append(f"{r['first'] + ' - ' + r['second']:<26}{r['metric']:<20}{r['difference']:>10.3f}"
+                     f"{interval:>22}{r['p_value']:>8.3f}{required:>14}")
+    return "\n".join(lines)
@@ -0,0 +1,321 @@
+import hashlib
+import itertools
+import json
+import marshal
+import math
+import os
+import sys
+import tempfile
+
+try:
+    from .card import Card
+    from .player import HAND_RULES
+except ImportError: # running from inside the Simulation folder
+    from card import Card
+    from player import HAND_RULES
+
+# Generates a specialized hand evaluator from the scoring rules.
+# Everything that depends only on the ranks of the played cards (rank histogram, pairs,
+# straights, chip sums) is worked out once at generation time and written out as lookup
+# tables keyed by the sorted ranks; the generated evaluate() is straight-line code that
+# builds the key, checks for a flush and does one dict lookup.
+# The tables are cached on disk as marshal data under a hash of the rules, so a change to the
+# rules produces (and from then on reuses) new tables automatically. The evaluate() code itself
+# is fixed and small; it is compiled once per process and run against the loaded tables.
+# Modifiers (jokers, card enhancements; see modifiers.py) are part of the rules. Effects that
+# depend on the hand or on the ranks of the scoring cards are folded into the tables, so they
+# cost nothing when scoring. Effects that depend on suits or on particular cards go into a
+# per-card BONUS table that the generated evaluate() adds up over the scoring cards.
+
+GENERATOR_VERSION = 3
+
+# Hands in the order Player.checkScore compares them; ties go to the earlier hand
+HAND_ORDER = ["Straight Flush", "Four of a Kind", "Full House", "Flush", "Straight", "Triple", "Two Pair", "Pair", "High Card"]
+
+MAX_PLAYED = 5
+
+def default_rules():
+    """Scoring rules of the base game: hand base chips/multipliers and card chip values"""
+    return {
+        "hands": {name: list(HAND_RULES[name]) for name in HAND_ORDER},
+        "chips": {rank: Card(rank).chips for rank in range(1, 14)},
+    }
+
+def rules_hash(rules):
+    data = json.dumps({"version": GENERATOR_VERSION, "rules": rules}, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+def _is_straight(ranks):
+    """Straight test of Player.checkScore: 5 distinct ranks, consecutive or 10-A"""
+    unique = sorted(set(ranks), reverse=True)
+    if len(unique) < 5:
+        return False
+    if set(unique) == {1, 13, 12, 11, 10}:
+        return True
+    return all(unique[0] - i in unique for i in range(5))
+
+def score_ranks(ranks, flush, rules):
+    """
+    (hand name, score) of a played hand given its ranks and whether it is a 5-card flush.
+    Mirrors Player.checkScore for the given rules; only used at generation time.
+    """
+    hands, chip_values = rules["hands"], rules["chips"]
+    chips = lambda rank: chip_values[rank]
+    n = len(ranks)
+    counts = {}
+    for rank in ranks:
+        counts[rank] = counts.get(rank, 0) + 1
+
+    def value(name, card_chips):
+        base, mult = hands[name]
+        return (base + card_chips) * mult
+
+    scores = {}
+    straight = n >= 5 and _is_straight(ranks)
+    if n >= 5 and flush and straight:
+        scores["Straight Flush"] = value("Straight Flush", sum(chips(r) for r in ranks))
+    fours = [chips(r) for r, c in counts.items() if c >= 4]
+    if n >= 4 and fours:
+        scores["Four of a Kind"] = value("Four of a Kind", max(fours) * 4)
+    triples = [r for r, c in counts.items() if c >= 3]
+    if n >= 5 and triples:
+        triple = max(triples, key=chips)
+        pairs = [chips(r) for r, c in counts.items() if r != triple and c >= 2]
+        if pairs:
+            scores["Full House"] = value("Full House", chips(triple) * 3 + max(pairs) * 2)
+    if n >= 5 and flush:
+        scores["Flush"] = value("Flush", sum(chips(r) for r in ranks))
+    if straight:
+        scores["Straight"] = value("Straight", sum(chips(r) for r in set(ranks)))
+    if n >= 3 and triples:
+        scores["Triple"] = value("Triple", max(chips(r) for r in triples) * 3)
+    pairs = sorted((chips(r) for r, c in counts.items() if c >= 2), reverse=True)
+    if n >= 4 and len(pairs) >= 2:
+        scores["Two Pair"] = value("Two Pair", pairs[0] * 2 + pairs[1] * 2)
+    if n >= 2 and pairs:
+        scores["Pair"] = value("Pair", pairs[0] * 2)
+
+    best_name, best_score = "High Card", value("High Card", max(chips(r) for r in ranks)) if ranks else 0
+    for name in HAND_ORDER:
+        if scores.get(name, 0) > best_score:
+            best_name, best_score = name, scores[name]
+    return best_name, best_score
+
+def scoring_ranks(name, ranks, rules):
+    """
+    Ranks of the cards that count towards the chips of a hand, e.g. the two 5s of a pair of 5s.
+    Matches the card chips score_ranks adds up for that hand.
+    """
+    chips = rules["chips"]
+    counts = {}
+    for rank in ranks:
+        counts[rank] = counts.get(rank, 0) + 1
+    by_chips = lambda rank: (chips[rank], rank)
+    if name in ("Straight Flush", "Flush", "Straight"):
+        return tuple(ranks)
+    if name == "High Card":
+        return (max(ranks, key=by_chips),) if ranks else ()
+    if name == "Full House":
+        triple = max((r for r, c in counts.items() if c >= 3), key=by_chips)
+        pair = max((r for r, c in counts.items() if r != triple and c >= 2), key=by_chips)
+        return (triple,) * 3 + (pair,) * 2
+    size = {"Four of a Kind": 4, "Triple": 3, "Two Pair": 2, "Pair": 2}[name]
+    groups = sorted((r for r, c in counts.items() if c >= size), key=by_chips, reverse=True)
+    groups = groups[:2] if name == "Two Pair" else groups[:1]
+    return tuple(r for r in groups for _ in range(size))
+
+def combine_modifiers(modifiers):
+    """
+    Sums the effects of the active modifiers (dicts as written by Modifier.to_dict):
+    chips and mult by hand, xmult by hand (multiplied together), chips and mult per scoring
+    card by rank, and a per-card (chips, mult) bonus by (rank, suit) for suit and card effects
+    """
+    combined = {"hand_chips": {}, "hand_mult": {}, "hand_xmult": {}, "rank_chips": {}, "rank_mult": {}, "card": {}}
+
+    def add(table, key, value):
+        table[key] = table.get(key, 0) + value
+
+    for modifier in modifiers:
+        for field in ("hand_chips", "hand_mult", "rank_chips", "rank_mult"):
+            for key, value in modifier.get(field, {}).items():
+                add(combined[field], int(key) if field.startswith("rank") else key, value)
+        for name, value in modifier.get("hand_xmult", {}).items():
+            combined["hand_xmult"][name] = combined["hand_xmult"].get(name, 1) * value
+        for suit in ("hearts", "diamonds", "clubs", "spades"):
+            for rank in range(1, 14):
+                card = f"{rank}:{suit}"
+                bonus = (modifier.get("suit_chips", {}).get(suit, 0) + modifier.get("card_chips", {}).get(card, 0),
+                         modifier.get("suit_mult", {}).get(suit, 0) + modifier.get("card_mult", {}).get(card, 0))
+                if bonus != (0, 0):
+                    chips, mult = combined["card"].get((rank, suit), (0, 0))
+                    combined["card"][(rank, suit)] = (chips + bonus[0], mult + bonus[1])
+    return combined
+
+def hand_entry(ranks, flush, rules, combined):
+    """
+    Table entry of a hand under the modifiers: (hand name, chips, mult, xmult, scoring rank mask).
+    The hand is named as without modifiers; modifiers change what it scores, not what it is.
+    """
+    name, _ = score_ranks(ranks, flush, rules)
+    base, mult = rules["hands"][name]
+    scoring = scoring_ranks(name, ranks, rules)
+    chips = base + combined["hand_chips"].get(name, 0)
+    chips += sum(rules["chips"][r] + combined["rank_chips"].get(r, 0) for r in scoring)
+    mult += combined["hand_mult"].get(name, 0) + sum(combined["rank_mult"].get(r, 0) for r in scoring)
+    mask = 0
+    for r in scoring:
+        mask |= 1 << r
+    return name, chips, mult, combined["hand_xmult"].get(name, 1), mask
+
+def final_score(chips, mult, xmult):
+    return math.floor(chips * mult * xmult)
+
+def rank_keys(max_played=MAX_PLAYED):
+    """Every sorted rank tuple of 1 to max_played cards"""
+    for n in range(1, max_played + 1):
+        yield from itertools.combinations_with_replacement(range(1, 14), n)
+
+# The evaluate() functions of the generated evaluators. They only read the tables (PLAIN, FLUSH
+# and, with suit or card effects, BONUS), so this code is the same for every set of rules.
+EVALUATE_SOURCE = '''
+def _entry(cards):
+    n = len(cards)
+    if n == 5:
+        a, b, c, d, e = cards
+        key = tuple(sorted((a.rank, b.rank, c.rank, d.rank, e.rank)))
+        if a.suit == b.suit == c.suit == d.suit == e.suit:
+            return FLUSH.get(key) or PLAIN[key]
+        return PLAIN[key]
+    if n == 4:
+        a, b, c, d = cards
+        return PLAIN[tuple(sorted((a.rank, b.rank, c.rank, d.rank)))]
+    if n == 3:
+        a, b, c = cards
+        return PLAIN[tuple(sorted((a.rank, b.rank, c.rank)))]
+    if n == 2:
+        a, b = cards
+        return PLAIN[(a.rank, b.rank) if a.rank <= b.rank else (b.rank, a.rank)]
+    if n == 1:
+        return PLAIN[(cards[0].rank,)]
+    return None
+'''
+
+PLAIN_SOURCE = EVALUATE_SOURCE + '''
+evaluate = _entry
+evaluate.__doc__ = "(hand name, score) of the played cards, or None for hands this module does not cover"
+
+def evaluate_ranks(ranks, flush=False):
+    """Same as evaluate() for a sorted rank tuple"""
+    if flush:
+        return FLUSH.get(ranks) or PLAIN[ranks]
+    return PLAIN[ranks]
+'''
+
+PER_CARD_SOURCE = EVALUATE_SOURCE + '''
+def evaluate(cards):
+    """(hand name, score) of the played cards, or None for hands this module does not cover"""
+    entry = _entry(cards)
+    if entry is None:
+        return None
+    name, chips, mult, xmult, mask = entry
+    for card in cards:
+        if mask >> card.rank & 1:
+            row = BONUS.get(card.suit)
+            if row:
+                card_chips, card_mult = row[card.rank]
+                chips += card_chips
+                mult += card_mult
+    return name, int(chips * mult * xmult)
+
+def evaluate_ranks(ranks, flush=False):
+    """Same as evaluate() for a sorted rank tuple, without the per-card bonuses"""
+    name, chips, mult, xmult, _ = (FLUSH.get(ranks) if flush else None) or PLAIN[ranks]
+    return name, int(chips * mult * xmult)
+'''
+
+def generate_tables(rules):
+    """
+    Tables of an evaluator specialized for the given rules:
+    PLAIN: by sorted ranks of the played cards, (hand name, score), or with per-card effects
+      (hand name, chips, mult, xmult, bit mask of the scoring ranks);
+    FLUSH: the same for 5 cards of one suit, where that changes the entry;
+    BONUS: with per-card effects, the (chips, mult) each scoring card adds, by suit and then rank.
+    """
+    combined = combine_modifiers(rules.get("modifiers", []))
+    per_card = bool(combined["card"])
+
+    def entry(key, flush):
+        if not rules.get("modifiers"):
+            return score_ranks(key, flush, rules)
+        name, chips, mult, xmult, mask = hand_entry(key, flush, rules, combined)
+        if per_card:
+            return name, chips, mult, xmult, mask
+        return name, final_score(chips, mult, xmult)
+
+    plain = {key: entry(key, False) for key in rank_keys()}
+    flush = {key: entry(key, True) for key in rank_keys() if len(key) == MAX_PLAYED}
+    # Only store flush entries that differ from the plain ones
+    flush = {key: result for key, result in flush.items() if result != plain[key]}
+    tables = {"GENERATOR_VERSION": GENERATOR_VERSION, "RULES_HASH": rules_hash(rules),
+              "RULES": json.dumps(rules, sort_keys=True), "PLAIN": plain, "FLUSH": flush}
+    if per_card:
+        bonus = {}
+        for (rank, suit), value in combined["card"].items():
+            bonus.setdefault(suit, [(0, 0)] * 14)[rank] = value
+        tables["BONUS"] = bonus
+    return tables
+
+_code = {} # compiled evaluate() source, by whether it has per-card bonuses
+
+def build_module(name, tables):
+    """Evaluator module from generated tables"""
+    per_card = "BONUS" in tables
+    if per_card not in _code:
+        _code[per_card] = compile(PER_CARD_SOURCE if per_card else PLAIN_SOURCE, f"<{__name__} evaluator>", "exec")
+    module = type(sys)(name)
+    module.__dict__.update(tables)
+    exec(_code[per_card], module.__dict__)
+    return module
+
+def cache_dir():
+    return os.environ.get("BALATROSIM_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "balatrosim"))
+
+_loaded = {}
+
+def load_evaluator(rules=None):
+    """
+    Returns the evaluator module for the rules (default: the base game).
+    Looks in memory, then in the on-disk cache, and generates the tables if neither has them.
+    The tables are stored as marshal data rather than Python source, so loading them costs
+    a few milliseconds whether or not the interpreter may write bytecode.
+    """
+    rules = rules or default_rules()
+    digest = rules_hash(rules)
+    if digest in _loaded:
+        return _loaded[digest]
+
+    name = f"evaluator_{digest}"
+    path = os.path.join(cache_dir(), name + ".marshal")
+    tables = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                tables = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            tables = None # unreadable (e.g. written by another Python version): generate again
+    if tables is None:
+        tables = generate_tables(rules)
+        try:
+            os.makedirs(cache_dir(), exist_ok=True)
+            # Write to a temporary file first so concurrent workers never see partial tables
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir(), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                marshal.dump(tables, f)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass # read-only or missing home directory: keep the tables in memory only
+
+    module = build_module(name, tables)
+    _loaded[digest] = module
+    return module
@@ -1,16 +1,30 @@
 import random
-from card import Card
+try:
+    from .card import Card
+except ImportError: # running from inside the Simulation folder
+    from card import Card
+
+# Cards are never modified once created, so every deck shares the same 52 objects
+CARDS = tuple(Card(rank, suit) for suit in ['hearts', 'diamonds', 'clubs', 'spades'] for rank in range(1, 14))
 
 class Deck:
     def __init__(self):
-        self.cards = []
-        for suit in ['hearts', 'diamonds', 'clubs', 'spades']:
-            for rank in range(1, 14):
-                self.cards.append(Card(rank, suit))
+        self.cards = list(CARDS)
                 
     def shuffle(self):
         random.shuffle(self.cards)
 
+    def reset(self, order=None):
+        """
+        Puts all 52 cards back (in the original order) and shuffles, reusing the same list
+        If an order is given, the deck takes that order instead of being shuffled (cards are drawn from the end)
+        """
+        if order is not None:
+            self.cards[:] = order
+            return
+        self.cards[:] = CARDS
+        self.shuffle()
+
     def draw(self):
         try:
             return self.cards.pop()
@@ -0,0 +1,184 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+
+try:
+    from .runner import METRICS, run_chunk, strategy_label
+    from .sketch import StrategySketch
+except ImportError: # running from inside the Simulation folder
+    from runner import METRICS, run_chunk, strategy_label
+    from sketch import StrategySketch
+
+# Spreading seed ranges over several hosts.
+# A coordinator owns the list of seed chunks and hands them out over TCP; workers connect,
+# lease a chunk, play it with runner.run_chunk and send back the chunk's sketch.
+# Messages are single lines of JSON. A chunk leased by a worker whose connection drops, or
+# that is not returned within lease_timeout seconds, goes back to the queue for another worker.
+# Results for a chunk that was already completed are ignored, so a slow worker and its
+# replacement can both finish the same chunk without double counting.
+
+class Coordinator:
+    def __init__(self, key, iterations, start=0, chunk_size=250, host="127.0.0.1", port=0,
+                 lease_timeout=300, progress=None):
+        self.key = key
+        self.chunks = {i: (lo, min(lo + chunk_size, start + iterations))
+                       for i, lo in enumerate(range(start, start + iterations, chunk_size))}
+        self.pending = list(self.chunks)
+        self.leases = {} # chunk id -> (worker, deadline)
+        self.done = set()
+        self.sketch = StrategySketch(strategy_label(key), METRICS)
+        self.lease_timeout = lease_timeout
+        self.progress = progress
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not self.chunks:
+            self.finished.set()
+
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                worker = None
+                try:
+                    for line in self.rfile:
+                        message = json.loads(line)
+                        worker = message.get("worker", worker)
+                        reply = coordinator.handle(message)
+                        self.wfile.write(json.dumps(reply).encode() + b"\n")
+                        self.wfile.flush()
+                except (ConnectionError, ValueError):
+                    pass
+                finally:
+                    # Whatever this worker still holds is handed to someone else
+                    if worker is not None:
+                        coordinator.release(worker)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        for chunk, (worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[chunk]
+                self.pending.append(chunk)
+
+    def release(self, worker):
+        with self.lock:
+            for chunk, (holder, _) in list(self.leases.items()):
+                if holder == worker:
+                    del self.leases[chunk]
+                    self.pending.append(chunk)
+
+    def handle(self, message):
+        with self.lock:
+            op = message["op"]
+            if op == "lease":
+                self._expire_leases()
+                if self.finished.is_set():
+                    return {"done": True}
+                if not self.pending:
+                    return {"wait": True}
+                chunk = self.pending.pop(0)
+                self.leases[chunk] = (message["worker"], time.monotonic() + self.lease_timeout)
+                lo, hi = self.chunks[chunk]
+                return {"chunk": chunk, "strategy": self.key, "start": lo, "stop": hi}
+            if op == "result":
+                chunk = message.get("chunk")
+                if chunk not in self.chunks:
+                    # Not one of this run's chunks (a worker left over from another run): ignore it
+                    return {"ok": False}
+                self.leases.pop(chunk, None)
+                if chunk not in self.done:
+                    self.done.add(chunk)
+                    if chunk in self.pending:
+                        self.pending.remove(chunk)
+                    self.sketch.merge(StrategySketch.from_dict(message["sketch"]))
+                    if self.progress:
+                        self.progress(self.sketch, self.sketch.games)
+                    if len(self.done) == len(self.chunks):
+                        self.finished.set()
+                return {"ok": True}
+            return {"error": f"unknown op {op}"}
+
+    def serve(self, timeout=None):
+        """Serves until every chunk is done and returns the merged sketch"""
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            if not self.finished.wait(timeout):
+                raise TimeoutError(f"{len(self.done)}/{len(self.chunks)} chunks done before the timeout")
+            # Give connected workers a moment to hear that the run is over
+            time.sleep(0.2)
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+        return self.sketch
+
+def work(host, port, worker=None, retry_for=10.0, poll=0.2):
+    """Worker loop: leases chunks from a coordinator until it reports that the run is done"""
+    worker = worker or f"{socket.gethostname()}:{threading.get_native_id()}"
+    deadline = time.monotonic() + retry_for
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+        except ConnectionRefusedError:
+            # The coordinator may not be listening yet
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(poll)
+
+    played = 0
+    with connection, connection.makefile("rwb") as stream:
+        def request(message):
+            message["worker"] = worker
+            stream.write(json.dumps(message).encode() + b"\n")
+            stream.flush()
+            line = stream.readline()
+            if not line:
+                raise ConnectionError("coordinator closed the connection")
+            return json.loads(line)
+
+        while True:
+            try:
+                reply = request({"op": "lease"})
+            except ConnectionError:
+                # The coordinator shuts down once every chunk is in
+                return played
+            if reply.get("done"):
+                return played
+            if reply.get("wait"):
+                time.sleep(poll)
+                continue
+            sketch = run_chunk((reply["strategy"], reply["start"], reply["stop"]))
+            played += reply["stop"] - reply["start"]
+            try:
+                request({"op": "result", "chunk": reply["chunk"], "sketch": sketch.to_dict()})
+            except ConnectionError:
+                # A straggler: the chunk was leased again and the run finished without this result
+                return played
+
+def _work_process(host, port, worker):
+    work(host, port, worker)
+
+def run_local(key, iterations, workers=4, start=0, chunk_size=250, lease_timeout=300, progress=None):
+    """Coordinator plus worker processes on localhost, standing in for several hosts"""
+    from multiprocessing import Process
+
+    coordinator = Coordinator(key, iterations, start, chunk_size, lease_timeout=lease_timeout, progress=progress)
+    host, port = coordinator.address
+    processes = [Process(target=_work_process, args=(host, port, f"local-{i}")) for i in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        return coordinator.serve()
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,268 @@
+import random
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+
+try:
+    from .deck import CARDS
+    from .kernel import GameKernel
+    from .player import HAND_RULES, Player, TARGET_SCORE
+    from .strategicPlayer import StrategicPlayer
+except ImportError: # running from inside the Simulation folder
+    from deck import CARDS
+    from kernel import GameKernel
+    from player import HAND_RULES, Player, TARGET_SCORE
+    from strategicPlayer import StrategicPlayer
+
+# Exact probability of reaching the target score from a late-round state.
+# Instead of sampling draws, every possible draw (every set of cards that can come off the
+# deck) is enumerated; all draws of the same size are equally likely. A standard deck has one
+# card of every (rank, suit), so there are no identical cards to merge and each action fans
+# out into C(cards left, cards drawn) states: the solver is meant for the last actions of a
+# round and refuses states with more than MAX_ACTIONS plays and discards left, unless a larger
+# limit is passed explicitly.
+#
+# The probability is that of the strategy's canonical policy, not of the strategy exactly as
+# StrategicPlayer plays it:
+# - The hand is kept sorted by (rank, suit) at every decision, so strategies that break
+#   ties by hand position (the first best 5-card subset, Flush's suit tie-break) see the
+#   canonical order rather than the draw order.
+# - States are memoized after relabeling suits into a canonical order, and the strategy
+#   decides on the relabeled state.
+# The two agree wherever the strategy's decision has no such tie.
+
+SUITS = ['hearts', 'diamonds', 'clubs', 'spades']
+
+# Plays plus discards left above which a state is too early in the round to enumerate
+MAX_ACTIONS = 2
+
+# Games played out per decision that score_decisions estimates instead of solving
+ROLLOUTS = 1000
+
+# The deck's shared card for each (rank, suit), so strategies can inspect states without building new cards
+_CARDS = {(card.rank, card.suit): card for card in CARDS}
+
+def _chips(rank):
+    return _CARDS[(rank, SUITS[0])].chips
+
+class _Deck:
+    def __init__(self, cards):
+        self.cards = cards
+
+# A bare player to score with; the solver uses the base game rules, without modifiers
+_SCORER = Player.__new__(Player)
+
+@lru_cache(maxsize=1 << 20)
+def _score(cards):
+    return _SCORER.checkScore([_CARDS[c] for c in cards])
+
+class _Position:
+    """Just enough of a StrategicPlayer for strategies to make a decision"""
+    choose_action = StrategicPlayer.choose_action
+
+    def checkScore(self, playing_hand):
+        # Sibling states share most of their 5-card subsets, so scores are looked up by (rank, suit)
+        return _score(tuple(sorted((card.rank, card.suit) for card in playing_hand)))
+
+    def __init__(self, strategy, hand, deck, plays, discards, score):
+        self.strategy = strategy
+        self.target_hand = strategy.target_hand
+        self.hand = [_CARDS[c] for c in hand]
+        self.deck = _Deck([_CARDS[c] for c in deck])
+        self.playsRemaining = plays
+        self.discardsRemaining = discards
+        self.currentScore = score
+
+def max_hand_score(cards):
+    """
+    Upper bound on the score of a single play using any of the given (rank, suit) cards.
+    Used to prune states that cannot reach the target even if every remaining play is perfect.
+    """
+    ranks = {}
+    suits = {}
+    for rank, suit in cards:
+        ranks[rank] = ranks.get(rank, 0) + 1
+        suits.setdefault(suit, set()).add(rank)
+
+    def value(name, card_chips):
+        base, mult = HAND_RULES[name]
+        return (base + card_chips) * mult
+
+    windows = [[1, 2, 3, 4, 5]] + [list(range(low, low + 5)) for low in range(2, 10)] + [[10, 11, 12, 13, 1]]
+    by_chips = sorted(ranks, key=_chips, reverse=True)
+    best = value("High Card", _chips(by_chips[0])) if by_chips else 0
+
+    for window in windows:
+        window_chips = sum(_chips(r) for r in window)
+        if all(r in ranks for r in window):
+            best = max(best, value("Straight", window_chips))
+        if any(all(r in suit_ranks for r in window) for suit_ranks in suits.values()):
+            best = max(best, value("Straight Flush", window_chips))
+    for suit_ranks in suits.values():
+        if len(suit_ranks) >= 5:
+            top = sorted((_chips(r) for r in suit_ranks), reverse=True)[:5]
+            best = max(best, value("Flush", sum(top)))
+
+    pairs = [r for r in by_chips if ranks[r] >= 2]
+    triples = [r for r in by_chips if ranks[r] >= 3]
+    fours = [r for r in by_chips if ranks[r] >= 4]
+    if fours:
+        best = max(best, value("Four of a Kind", _chips(fours[0]) * 4))
+    if triples:
+        best = max(best, value("Triple", _chips(triples[0]) * 3))
+        others = [r for r in pairs if r != triples[0]]
+        if others:
+            best = max(best, value("Full House", _chips(triples[0]) * 3 + _chips(others[0]) * 2))
+    if len(pairs) >= 2:
+        best = max(best, value("Two Pair", _chips(pairs[0]) * 2 + _chips(pairs[1]) * 2))
+    if pairs:
+        best = max(best, value("Pair", _chips(pairs[0]) * 2))
+    return best
+
+def _canonical(hand, deck):
+    """Relabels suits so that equivalent states share a memo entry"""
+    signature = {}
+    for suit in SUITS:
+        in_hand = tuple(sorted(r for r, s in hand if s == suit))
+        in_deck = tuple(sorted(r for r, s in deck if s == suit))
+        signature[suit] = (in_hand, in_deck)
+    order = sorted(SUITS, key=lambda suit: signature[suit])
+    relabel = {suit: SUITS[i] for i, suit in enumerate(order)}
+    hand = tuple(sorted((r, relabel[s]) for r, s in hand))
+    deck = tuple(sorted((r, relabel[s]) for r, s in deck))
+    return hand, deck
+
+class ExactSolver:
+    """
+    Computes exact win probabilities of a strategy's canonical policy (see the notes above).
+    The memo is kept between calls, so scoring every decision of a game (or of many games)
+    reuses the subtrees they have in common.
+    max_actions: most plays plus discards left in a state the solver agrees to enumerate.
+    """
+    def __init__(self, strategy, target=TARGET_SCORE, max_actions=MAX_ACTIONS):
+        self.strategy = strategy
+        self.target = target
+        self.max_actions = max_actions
+        self.memo = {}
+        self.nodes = 0
+
+    def solvable(self, plays, discards):
+        return plays + discards <= self.max_actions
+
+    def win_probability(self, hand, deck, plays, discards, score):
+        """
+        hand: iterable of Card (or (rank, suit) tuples)
+        deck: iterable of the Cards that can still be drawn, in any order
+        """
+        if not self.solvable(plays, discards):
+            raise ValueError(f"{plays} plays and {discards} discards left; the solver enumerates every draw and only "
+                             f"takes states with at most {self.max_actions} actions left (see max_actions)")
+        hand = tuple(sorted(_as_class(c) for c in hand))
+        deck = tuple(sorted(_as_class(c) for c in deck))
+        return self._value(hand, deck, plays, discards, score)
+
+    def _value(self, hand, deck, plays, discards, score):
+        if score >= self.target:
+            return 1.0
+        if plays <= 0:
+            return 0.0
+        # With one play and no discards left nothing more will be drawn, so only the hand counts
+        reachable = hand if plays == 1 and discards == 0 else hand + deck
+        if score + plays * max_hand_score(reachable) < self.target:
+            return 0.0
+
+        hand, deck = _canonical(hand, deck)
+        key = (hand, deck, plays, discards, score)
+        if key in self.memo:
+            return self.memo[key]
+        self.nodes += 1
+
+        position = _Position(self.strategy, hand, deck, plays, discards, score)
+        action = position.choose_action()
+        if action is None:
+            value = 0.0
+        else:
+            kind, indices = action
+            indices = set(i for i in indices if 0 <= i < len(hand))
+            kept = [c for i, c in enumerate(hand) if i not in indices]
+            if kind == "play":
+                _, gained = position.checkScore([position.hand[i] for i in sorted(indices)])
+                score += gained
+                plays -= 1
+            else:
+                discards -= 1
+
+            if score >= self.target:
+                value = 1.0
+            elif plays <= 0:
+                value = 0.0
+            else:
+                # Every set of n cards is an equally likely draw
+                n = min(len(indices), len(deck))
+                value = 0.0
+                for drawn in combinations(range(len(deck)), n):
+                    new_hand = tuple(sorted(kept + [deck[i] for i in drawn]))
+                    rest = tuple(c for i, c in enumerate(deck) if i not in drawn)
+                    value += self._value(new_hand, rest, plays, discards, score)
+                value /= comb(len(deck), n)
+
+        self.memo[key] = value
+        return value
+
+def _as_class(card):
+    return card if isinstance(card, tuple) else (card.rank, card.suit)
+
+def win_probability(player, strategy=None, target=TARGET_SCORE, solver=None):
+    """
+    Exact probability that the canonical policy of `strategy` (default: the player's own) reaches
+    `target` from the player's state, which must be late enough in the round for the solver
+    """
+    solver = solver or ExactSolver(strategy or player.strategy, target)
+    return solver.win_probability(player.hand, player.deck.cards, player.playsRemaining,
+                                  player.discardsRemaining, player.currentScore)
+
+def estimate_win_probability(player, rollouts=ROLLOUTS, target=TARGET_SCORE, seed=0):
+    """
+    Win probability of the player's strategy from the player's state, estimated by playing the
+    position out `rollouts` times over seeded shuffles of the remaining deck.
+    Returns (estimate, standard error).
+    """
+    rng = random.Random(seed)
+    kernel = GameKernel(player.strategy)
+    order = list(player.deck.cards)
+    wins = 0
+    for _ in range(rollouts):
+        rng.shuffle(order)
+        kernel.load(player.hand, order, player.playsRemaining, player.discardsRemaining, player.currentScore,
+                    scoring=player.scoring)
+        wins += kernel.finish(target) >= target
+    p = wins / rollouts
+    return p, (p * (1 - p) / max(rollouts - 1, 1)) ** 0.5
+
+def score_decisions(strategy_class, seed, target=TARGET_SCORE, solver=None, rollouts=ROLLOUTS):
+    """
+    Replays a seeded game and returns (action, win probability before the action, method) for every decision.
+    method is "exact" where the solver can enumerate the state, and "estimated" for decisions too
+    early in the round: their probability comes from `rollouts` seeded play-outs of the strategy
+    as StrategicPlayer plays it (see estimate_win_probability), so it carries sampling error.
+    Pass a shared solver to reuse its memo across games.
+    """
+    random.seed(seed)
+    player = StrategicPlayer(strategy_class())
+    solver = solver or ExactSolver(player.strategy, target)
+    scored = []
+    while player.playsRemaining > 0 or player.discardsRemaining > 0:
+        if solver.solvable(player.playsRemaining, player.discardsRemaining):
+            probability, method = win_probability(player, solver=solver), "exact"
+        else:
+            probability, _ = estimate_win_probability(player, rollouts, target, seed=f"{seed}:{len(scored)}")
+            method = "estimated"
+        action = player.choose_action()
+        scored.append((action, probability, method))
+        if action is None:
+            break
+        kind, indices = action
+        applied = player.play(indices) if kind == "play" else player.discard(indices)
+        if not applied:
+            break
+    return scored
@@ -0,0 +1,171 @@
+import csv
+import random
+
+try:
+    from .deck import CARDS
+    from .kernel import GameKernel
+    from .runner import STRATEGIES, strategy_label
+except ImportError: # running from inside the Simulation folder
+    from deck import CARDS
+    from kernel import GameKernel
+    from runner import STRATEGIES, strategy_label
+
+# Whole runs: a chain of blinds with rising targets, played until the first blind that is lost.
+# Every blind starts from a fresh shuffle of the full deck, as in the game, and ends as soon as
+# its target is reached; what carries over from blind to blind is the run's own random
+# generator, its strategy and modifiers, and the running totals in the records.
+# Blinds are played on one GameKernel per worker, so a run keeps no hand history, and
+# iter_rounds yields one small record per blind so any number of runs can be streamed to a
+# file or folded into a SurvivalCurve without holding them in memory.
+
+# Base target of antes 1 to 8 and the multiplier of each blind, as in the base game
+ANTE_TARGETS = [300, 800, 2000, 5000, 11000, 20000, 35000, 50000]
+BLINDS = [("Small", 1.0), ("Big", 1.5), ("Boss", 2.0)]
+
+RECORD_FIELDS = ["run", "round", "ante", "blind", "target", "score", "cleared", "plays_used", "discards_used", "total_score"]
+
+HAND_SIZE = 8
+
+def blind_schedule(ante_targets=ANTE_TARGETS, blinds=BLINDS, scale=1.0):
+    """[(ante, blind name, target)] for every blind of a run; scale multiplies every target"""
+    return [(ante, name, int(base * factor * scale))
+            for ante, base in enumerate(ante_targets, start=1) for name, factor in blinds]
+
+def iter_rounds(strategy, seed, schedule=None, plays=4, discards=4, scoring=None, kernel=None):
+    """
+    Plays one run and yields a record per blind, stopping after the first blind that is lost.
+    The run's deck orders come from random.Random(seed), so runs are reproducible without
+    touching the global random state.
+    scoring: an evaluator for modifiers (see modifiers.load_scoring), None for the base rules.
+    """
+    schedule = schedule or blind_schedule()
+    rng = random.Random(seed)
+    kernel = kernel or GameKernel(strategy)
+    order = list(CARDS)
+    total = 0
+    for i, (ante, blind, target) in enumerate(schedule):
+        rng.shuffle(order)
+        # Strategies that plan against the target (rollouts) aim for this blind's
+        if hasattr(strategy, "target"):
+            strategy.target = target
+        # The opening hand is the last 8 cards, as Deck.draw takes cards from the end
+        kernel.load(order[-HAND_SIZE:], order[:-HAND_SIZE], plays, discards, 0, strategy, scoring)
+        score = kernel.finish(target)
+        total += score
+        cleared = score >= target
+        yield {"run": seed, "round": i, "ante": ante, "blind": blind, "target": target, "score": score,
+               "cleared": cleared, "plays_used": plays - kernel.playsRemaining,
+               "discards_used": discards - kernel.discardsRemaining, "total_score": total}
+        if not cleared:
+            return
+
+class SurvivalCurve:
+    """How many runs cleared each blind of a schedule; mergeable like the sketches in sketch.py"""
+    def __init__(self, strategy, schedule):
+        self.strategy = strategy
+        self.schedule = [tuple(entry) for entry in schedule]
+        self.runs = 0
+        self.cleared = [0] * len(self.schedule)
+
+    def update(self, record):
+        if record["round"] == 0:
+            self.runs += 1
+        if record["cleared"]:
+            self.cleared[record["round"]] += 1
+
+    def merge(self, other):
+        if other.schedule != self.schedule:
+            raise ValueError("cannot merge survival curves of different schedules")
+        self.runs += other.runs
+        self.cleared = [a + b for a, b in zip(self.cleared, other.cleared)]
+        return self
+
+    def by_blind(self):
+        """[(ante, blind, target, share of runs that cleared it)]"""
+        return [(ante, blind, target, cleared / self.runs if self.runs else 0.0)
+                for (ante, blind, target), cleared in zip(self.schedule, self.cleared)]
+
+    def by_ante(self):
+        """{ante: share of runs that cleared every blind of that ante}"""
+        survival = {}
+        for ante, _, _, share in self.by_blind():
+            survival[ante] = share # the last blind of an ante is the one that counts
+        return survival
+
+    def to_dict(self):
+        return {"strategy": self.strategy, "schedule": self.schedule, "runs": self.runs, "cleared": self.cleared}
+
+    @classmethod
+    def from_dict(cls, data):
+        curve = cls(data["strategy"], data["schedule"])
+        curve.runs = data["runs"]
+        curve.cleared = list(data["cleared"])
+        return curve
+
+def run_runs_chunk(args):
+    """Plays runs [start, stop) of one strategy; returns their survival curve and, if asked, their records"""
+    key, start, stop, schedule, modifiers, keep_records = args
+    strategy = STRATEGIES[key]()
+    scoring = None
+    if modifiers:
+        try:
+            from .modifiers import load_scoring
+        except ImportError: # running from inside the Simulation folder
+            from modifiers import load_scoring
+        scoring = load_scoring(modifiers)
+    kernel = GameKernel(strategy)
+    curve = SurvivalCurve(strategy_label(key), schedule)
+    records = [] if keep_records else None
+    for seed in range(start, stop):
+        for record in iter_rounds(strategy, seed, schedule, scoring=scoring, kernel=kernel):
+            curve.update(record)
+            if keep_records:
+                records.append(record)
+    return curve, records
+
+def survival(key, runs, start=0, schedule=None, workers=1, chunk_size=100, modifiers=None, records_path=None,
+             progress=None):
+    """
+    Plays runs seeded start to start + runs - 1 and returns the strategy's SurvivalCurve.
+    records_path: if given, every per-blind record is appended there as CSV, chunk by chunk.
+    progress(curve, runs_done) is called after every merged chunk.
+    """
+    schedule = schedule or blind_schedule()
+    chunks = [(key, lo, min(lo + chunk_size, start + runs), schedule, modifiers, records_path is not None)
+              for lo in range(start, start + runs, chunk_size)]
+    total = SurvivalCurve(strategy_label(key), schedule)
+    out = open(records_path, "w", newline="") if records_path else None
+    writer = csv.DictWriter(out, fieldnames=RECORD_FIELDS) if out else None
+    if writer:
+        writer.writeheader()
+
+    def merge(result):
+        curve, records = result
+        total.merge(curve)
+        if writer:
+            writer.writerows(records)
+        if progress:
+            progress(total, total.runs)
+
+    try:
+        if workers > 1:
+            from multiprocessing import Pool
+            with Pool(workers) as pool:
+                for result in pool.imap(run_runs_chunk, chunks):
+                    merge(result)
+        else:
+            for chunk in chunks:
+                merge(run_runs_chunk(chunk))
+    finally:
+        if out:
+            out.close()
+    return total
+
+def format_survival(curves):
+    """Text table of the share of runs that survive each ante, one column per strategy"""
+    antes = sorted({ante for curve in curves for ante in curve.by_ante()})
+    lines = [f"{'Ante':<6}" + "".join(f"{curve.strategy:>14}" for curve in curves)]
+    for ante in antes:
+        lines.append(f"{ante:<6}" + "".join(f"{curve.by_ante().get(ante, 0.0):>14.4f}" for curve in curves))
+    lines.append(f"{'runs':<6}" + "".join(f"{curve.runs:>14}" for curve in curves))
+    return "\n".join(lines)
@@ -0,0 +1,168 @@
+import struct
+
+try:
+    from .deck import Deck, CARDS
+    from .player import Player, TARGET_SCORE
+except ImportError: # running from inside the Simulation folder
+    from deck import Deck, CARDS
+    from player import Player, TARGET_SCORE
+
+# Binary game traces.
+# A trace file is a 6-byte header followed by fixed-size records, one per game:
+#   seed        uint64 (little endian)
+#   deck        52 x uint8, card codes in deck order right after the shuffle
+#               (cards are drawn from the end, so the last 8 codes are the opening hand)
+#   n_actions   uint8
+#   actions     MAX_ACTIONS x (kind uint8, slot mask uint8), unused pairs are zero
+# A card code is suit_index * 13 + rank - 1 with suits in Deck order, i.e. the card's index in deck.CARDS.
+# Slot masks have bit i set when hand position i was played/discarded.
+# Fixed-size records let numpy decode a whole file with a single frombuffer call.
+
+MAGIC = b"BTRC"
+VERSION = 1
+HEADER = MAGIC + struct.pack("<BB", VERSION, 0)
+
+PLAY, DISCARD = 0, 1
+KINDS = {"play": PLAY, "discard": DISCARD}
+MAX_ACTIONS = 8 # 4 plays + 4 discards
+DECK_SIZE = 52
+
+SUITS = ['hearts', 'diamonds', 'clubs', 'spades']
+RECORD = struct.Struct(f"<Q{DECK_SIZE}sB{2 * MAX_ACTIONS}s")
+
+
+def card_code(card):
+    return SUITS.index(card.suit) * 13 + card.rank - 1
+
+def slot_mask(indices):
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    return mask
+
+def mask_slots(mask):
+    return [i for i in range(8) if mask >> i & 1]
+
+class GameTrace:
+    """Seed, starting deck order and actions of a single game"""
+    def __init__(self, seed=0, deck=b"", actions=None):
+        self.seed = seed
+        self.deck = bytes(deck)
+        self.actions = actions if actions is not None else [] # [(kind, mask), ...]
+
+    def start(self, player):
+        """Captures the deck order before the opening hand was drawn"""
+        # The hand was popped from the end of the deck, first card first
+        self.deck = bytes(card_code(card) for card in player.deck.cards + player.hand[::-1])
+        self.actions = []
+
+    def record(self, kind, indices):
+        self.actions.append((KINDS[kind], slot_mask(indices)))
+
+    def pack(self):
+        actions = bytes(b for action in self.actions for b in action)
+        return RECORD.pack(self.seed, self.deck, len(self.actions), actions)
+
+    @classmethod
+    def unpack(cls, data):
+        seed, deck, n_actions, actions = RECORD.unpack(data)
+        return cls(seed, deck, [(actions[2 * i], actions[2 * i + 1]) for i in range(n_actions)])
+
+class TraceWriter:
+    """Appends GameTrace records to a trace file"""
+    def __init__(self, path):
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(HEADER)
+
+    def write(self, trace):
+        self.file.write(trace.pack())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _check_header(header):
+    if header[:4] != MAGIC or header[4] != VERSION:
+        raise ValueError("Not a version %d trace file" % VERSION)
+
+def iter_traces(path):
+    """Yields GameTrace objects one at a time"""
+    with open(path, "rb") as f:
+        _check_header(f.read(len(HEADER)))
+        while True:
+            data = f.read(RECORD.size)
+            if len(data) < RECORD.size:
+                return
+            yield GameTrace.unpack(data)
+
+def read_traces(path):
+    """
+    Decodes a whole trace file into numpy arrays:
+      seed (N,), deck (N, 52), n_actions (N,), kind (N, MAX_ACTIONS), mask (N, MAX_ACTIONS),
+      slots (N, MAX_ACTIONS, 8) boolean slot membership unpacked from the masks
+    """
+    import numpy as np
+
+    dtype = np.dtype([("seed", "<u8"), ("deck", "u1", DECK_SIZE), ("n_actions", "u1"),
+                      ("actions", "u1", (MAX_ACTIONS, 2))])
+    with open(path, "rb") as f:
+        _check_header(f.read(len(HEADER)))
+        records = np.fromfile(f, dtype=dtype)
+    masks = records["actions"][:, :, 1]
+    return {
+        "seed": records["seed"],
+        "deck": records["deck"],
+        "n_actions": records["n_actions"],
+        "kind": records["actions"][:, :, 0],
+        "mask": masks,
+        "slots": np.unpackbits(masks[..., None], axis=-1, bitorder="little").astype(bool),
+    }
+
+class ReplayPlayer(Player):
+    """A Player whose deck comes from a trace instead of a shuffle"""
+    def __init__(self, trace, scoring=None):
+        self.strategy = None
+        self.deck = Deck.__new__(Deck)
+        self.deck.cards = [CARDS[code] for code in trace.deck]
+        self.hand = []
+        self.playsRemaining = 4
+        self.discardsRemaining = 4
+        self.currentScore = 0
+        self.remainingPlaysToWin = 0
+        self.history = []
+        self.target_hand = None
+        if scoring is not None:
+            # scoring(cards) -> (hand_name, score), used by play() instead of checkScore
+            self.checkScore = scoring
+        for i in range(8):
+            card = self.deck.draw()
+            if card:
+                self.hand.append(card)
+
+def replay(trace, scoring=None, target=TARGET_SCORE):
+    """
+    Re-applies the recorded actions, optionally under a different scoring rule.
+    The strategy is not consulted, so the same decisions are re-scored as they were made.
+    Played cards in the history are listed in hand-slot order.
+    """
+    player = ReplayPlayer(trace, scoring)
+    # Player.remainingPlaysToWin uses the module-level target, so it is tracked here instead
+    remaining_plays_to_win = 0
+    for kind, mask in trace.actions:
+        if kind == PLAY:
+            player.play(mask_slots(mask))
+            if remaining_plays_to_win == 0 and player.currentScore >= target:
+                remaining_plays_to_win = player.playsRemaining
+        else:
+            player.discard(mask_slots(mask))
+    return {
+        "score": player.currentScore,
+        "remainingPlaysToWin": remaining_plays_to_win,
+        "history": player.history,
+    }
@@ -0,0 +1,85 @@
+try:
+    from .player import Player, TARGET_SCORE
+    from .strategicPlayer import StrategicPlayer
+except ImportError: # running from inside the Simulation folder
+    from player import Player, TARGET_SCORE
+    from strategicPlayer import StrategicPlayer
+
+# A reusable game for playing out many continuations of the same position.
+# It exposes the same attributes strategies read from a Player (hand, deck.cards, counters,
+# checkScore), but keeps one hand list and one deck list for its whole lifetime: loading a
+# position copies cards into them in place, and playing keeps no history or card strings.
+
+class _KernelDeck:
+    def __init__(self):
+        self.cards = []
+
+    def draw(self):
+        return self.cards.pop() if self.cards else None
+
+class GameKernel:
+    checkScore = Player.checkScore
+    choose_action = StrategicPlayer.choose_action
+    scoring = None
+
+    def __init__(self, strategy=None):
+        self.strategy = strategy
+        self.target_hand = strategy.target_hand if strategy else []
+        self.hand = []
+        self.deck = _KernelDeck()
+        self.playsRemaining = 0
+        self.discardsRemaining = 0
+        self.currentScore = 0
+
+    def load(self, hand, deck_cards, plays, discards, score, strategy=None, scoring=None):
+        """
+        Copies a position into the kernel; deck_cards are in draw order (drawn from the end)
+        scoring: the evaluator of the game's modifiers (Player.scoring), None for the base rules
+        """
+        self.scoring = scoring
+        if strategy is not None:
+            self.strategy = strategy
+            self.target_hand = strategy.target_hand
+        self.hand[:] = hand
+        self.deck.cards[:] = deck_cards
+        self.playsRemaining = plays
+        self.discardsRemaining = discards
+        self.currentScore = score
+
+    def play(self, indices):
+        if not indices or self.playsRemaining <= 0:
+            return False
+        self.playsRemaining -= 1
+        hand = self.hand
+        _, hand_score = self.checkScore([hand[i] for i in indices])
+        self.currentScore += hand_score
+        for i in sorted(indices, reverse=True):
+            hand.pop(i)
+        cards = self.deck.cards
+        for _ in range(len(indices)):
+            if cards:
+                hand.append(cards.pop())
+        return True
+
+    def discard(self, indices):
+        if self.discardsRemaining <= 0:
+            return False
+        hand = self.hand
+        cards = self.deck.cards
+        for i in sorted(indices, reverse=True):
+            if 0 <= i < len(hand):
+                hand[i] = cards.pop() if cards else None
+        self.discardsRemaining -= 1
+        return True
+
+    def apply(self, action):
+        kind, indices = action
+        return self.play(indices) if kind == "play" else self.discard(indices)
+
+    def finish(self, target=TARGET_SCORE):
+        """Plays the loaded position out with the kernel's strategy; stops as soon as the target is reached"""
+        while (self.playsRemaining > 0 or self.discardsRemaining > 0) and self.currentScore < target:
+            action = self.choose_action()
+            if action is None or not self.apply(action):
+                break
+        return self.currentScore
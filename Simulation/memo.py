@@ -0,0 +1,204 @@
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from itertools import combinations
+
+try:
+    from .player import evaluator
+except ImportError: # running from inside the Simulation folder
+    from player import evaluator
+
+# Memoized best-play search.
+# The best 5-card play of a hand depends only on its cards and the scoring rules, and relabeling
+# suits does not change any score, so results are stored under a canonical code of the hand:
+# the sorted rank bit masks of its four suits, plus the hash of the scoring rules (with suit
+# bonuses from modifiers the suits are kept as they are).
+# An entry keeps the best score and every subset reaching it, in canonical card positions. A lookup maps those subsets back to the
+# caller's hand and picks the first one in itertools.combinations order, so cached and uncached
+# searches make exactly the same choice.
+# Strategies only ask for the overall best play and check whether its hand name is one of their
+# target hands, so one entry serves every strategy and none is kept per set of target hands.
+# The cache is off until enable() is called. Entries loaded or frozen before worker processes
+# are forked are shared by all of them and never written again; each worker adds its own new
+# entries to a separate bounded LRU. runner.run freezes the cache before it forks, so a warm-up
+# in the parent process (run --memo FILE --memo-warmup N) is shared by every worker, and with
+# every chunk it gets back the worker's lookups and new entries (see drain and absorb), so the
+# parent's statistics and saved entries cover the whole run.
+
+SUIT_INDEX = {'hearts': 0, 'diamonds': 1, 'clubs': 2, 'spades': 3}
+PLAY_SIZE = 5
+
+class BestPlayCache:
+    def __init__(self, maxsize=200000):
+        self.maxsize = maxsize
+        self.frozen = {} # read-only entries, shared with forked workers
+        self.entries = OrderedDict() # least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.added = None # keys put since the last drain, tracked once the cache is frozen for workers
+        self.drained = (0, 0) # hits and misses at the last drain
+
+    def __len__(self):
+        return len(self.frozen) + len(self.entries)
+
+    def get(self, key):
+        value = self.frozen.get(key)
+        if value is None:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.added is not None:
+            self.added.append(key)
+        self._store(key, value)
+
+    def _store(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def freeze(self):
+        """Moves every entry to the read-only part, e.g. after warming up and before forking workers"""
+        self.frozen.update(self.entries)
+        self.entries.clear()
+        self.added = []
+        self.drained = (self.hits, self.misses)
+
+    def drain(self):
+        """(hits, misses, new entries) since the cache was frozen or last drained; called in a worker after every chunk"""
+        entries = {key: self.entries[key] for key in self.added or () if key in self.entries}
+        hits, misses = self.hits - self.drained[0], self.misses - self.drained[1]
+        self.added = []
+        self.drained = (self.hits, self.misses)
+        return hits, misses, entries
+
+    def absorb(self, hits, misses, entries):
+        """Adds what a worker's drain() returned"""
+        self.hits += hits
+        self.misses += misses
+        for key, value in entries.items():
+            if key not in self.frozen and key not in self.entries:
+                self._store(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self), "frozen": len(self.frozen), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def save(self, path):
+        # Written under a temporary name first so a crash never leaves a truncated cache behind
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({**self.frozen, **self.entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Adds the entries saved at path as read-only entries"""
+        with open(path, "rb") as f:
+            self.frozen.update(pickle.load(f))
+        return self
+
+_cache = None
+
+def enable(maxsize=200000, path=None):
+    """Turns on the process-wide cache, loading saved entries from path if it exists"""
+    global _cache
+    _cache = BestPlayCache(maxsize)
+    if path and os.path.exists(path):
+        _cache.load(path)
+    return _cache
+
+def disable():
+    global _cache
+    _cache = None
+
+def cache():
+    """The process-wide cache, or None while it is off"""
+    return _cache
+
+def _canonical(player, hand):
+    """Cache key of the hand and, for every canonical position, the index of that card in the hand"""
+    scoring = getattr(player, "scoring", None) or evaluator()
+    masks = [0, 0, 0, 0]
+    for card in hand:
+        masks[SUIT_INDEX[card.suit]] |= 1 << card.rank
+    if hasattr(scoring, "BONUS"):
+        labels = (0, 1, 2, 3) # suits score differently, so they cannot be relabeled
+    else:
+        order = sorted(range(4), key=masks.__getitem__, reverse=True)
+        labels = [0] * 4
+        for label, suit in enumerate(order):
+            labels[suit] = label
+    canonical_masks = [0, 0, 0, 0]
+    for suit in range(4):
+        canonical_masks[labels[suit]] = masks[suit]
+    # Canonical position order: by relabeled suit, then rank
+    codes = [(labels[SUIT_INDEX[card.suit]] << 4 | card.rank, i) for i, card in enumerate(hand)]
+    codes.sort()
+    return (scoring.RULES_HASH, tuple(canonical_masks)), [i for _, i in codes]
+
+def _search(player, hand):
+    """
+    Scores every 5-card subset in order: (best score, [(name, indices)] of the subsets reaching
+    it, in the order they were found)
+    """
+    top = 0
+    ties = []
+    check = player.checkScore
+    for indices in combinations(range(len(hand)), PLAY_SIZE):
+        name, score = check([hand[i] for i in indices])
+        if score < top:
+            continue
+        if score > top:
+            top = score
+            ties = [(name, indices)]
+        elif score == top and top > 0:
+            ties.append((name, indices))
+    return top, ties
+
+def best_play(player):
+    """
+    (hand name, score, indices) of the best play of 5 cards from player.hand, or (None, 0, None)
+    if there is none. Same choice as scoring every combination in order and keeping the first
+    one with the highest score.
+    """
+    hand = player.hand
+    if len(hand) < PLAY_SIZE:
+        return None, 0, None
+    if None in hand:
+        # A slot left empty by an exhausted deck has no canonical code: search directly
+        top, ties = _search(player, hand)
+        return (ties[0][0], top, list(ties[0][1])) if ties else (None, 0, None)
+
+    key, positions = _canonical(player, hand)
+    entry = _cache.get(key) if _cache is not None else None
+    if entry is None:
+        top, ties = _search(player, hand)
+        canonical_of = [0] * len(hand)
+        for p, i in enumerate(positions):
+            canonical_of[i] = p
+        entry = (top, tuple((name, tuple(canonical_of[i] for i in indices)) for name, indices in ties))
+        if _cache is not None:
+            _cache.put(key, entry)
+
+    best_score, ties = entry
+    if not ties:
+        return None, 0, None
+    # The first tied subset in combinations order is the one with the smallest sorted indices
+    best_name = best_indices = None
+    for name, subset in ties:
+        indices = sorted(positions[p] for p in subset)
+        if best_indices is None or indices < best_indices:
+            best_name, best_indices = name, indices
+    return best_name, best_score, best_indices
@@ -0,0 +1,150 @@
+import json
+
+try:
+    from .codegen import HAND_ORDER, combine_modifiers, default_rules, final_score, load_evaluator
+except ImportError: # running from inside the Simulation folder
+    from codegen import HAND_ORDER, combine_modifiers, default_rules, final_score, load_evaluator
+
+# Jokers and card enhancements as declarative scoring modifiers.
+# A modifier only says what it adds: chips, mult or xmult for some hands, and chips or mult
+# for every scoring card of some rank, suit or particular card. The active modifiers are
+# compiled into the generated evaluator (see codegen.py) once, when a player is created, so
+# scoring a hand stays a table lookup however many modifiers are active.
+# A hand scores (chips + added chips) * (mult + added mult) * xmult, rounded down.
+# Plays of more than 5 cards are not in the tables; Player.checkScore scores them by the
+# reference rules and applies the modifiers with score_with_modifiers.
+
+class Modifier:
+    def __init__(self, name, hand_chips=None, hand_mult=None, hand_xmult=None, rank_chips=None, rank_mult=None,
+                 suit_chips=None, suit_mult=None, card_chips=None, card_mult=None):
+        """
+        hand_*: by hand name; rank_* by rank (1-13), suit_* by suit and card_* by (rank, suit),
+        added once for every scoring card that matches
+        """
+        self.name = name
+        self.hand_chips = hand_chips or {}
+        self.hand_mult = hand_mult or {}
+        self.hand_xmult = hand_xmult or {}
+        self.rank_chips = rank_chips or {}
+        self.rank_mult = rank_mult or {}
+        self.suit_chips = suit_chips or {}
+        self.suit_mult = suit_mult or {}
+        self.card_chips = card_chips or {}
+        self.card_mult = card_mult or {}
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "hand_chips": dict(self.hand_chips),
+            "hand_mult": dict(self.hand_mult),
+            "hand_xmult": dict(self.hand_xmult),
+            "rank_chips": {str(rank): value for rank, value in self.rank_chips.items()},
+            "rank_mult": {str(rank): value for rank, value in self.rank_mult.items()},
+            "suit_chips": dict(self.suit_chips),
+            "suit_mult": dict(self.suit_mult),
+            "card_chips": {f"{rank}:{suit}": value for (rank, suit), value in self.card_chips.items()},
+            "card_mult": {f"{rank}:{suit}": value for (rank, suit), value in self.card_mult.items()},
+        }
+
+    def __repr__(self):
+        return f"Modifier({self.name!r})"
+
+# Hands that contain a pair, a triple, etc., as jokers that trigger on "contains" count them
+CONTAINS = {
+    "Pair": ["Pair", "Two Pair", "Triple", "Full House", "Four of a Kind"],
+    "Two Pair": ["Two Pair", "Full House"],
+    "Triple": ["Triple", "Full House", "Four of a Kind"],
+    "Straight": ["Straight", "Straight Flush"],
+    "Flush": ["Flush", "Straight Flush"],
+}
+
+def _each(hands, value):
+    return {hand: value for hand in hands}
+
+# A few jokers from the base game, by the name used on the command line
+MODIFIERS = {
+    "joker": Modifier("Joker", hand_mult=_each(HAND_ORDER, 4)),
+    "jolly": Modifier("Jolly Joker", hand_mult=_each(CONTAINS["Pair"], 8)),
+    "zany": Modifier("Zany Joker", hand_mult=_each(CONTAINS["Triple"], 12)),
+    "droll": Modifier("Droll Joker", hand_mult=_each(CONTAINS["Flush"], 10)),
+    "crazy": Modifier("Crazy Joker", hand_mult=_each(CONTAINS["Straight"], 12)),
+    "sly": Modifier("Sly Joker", hand_chips=_each(CONTAINS["Pair"], 50)),
+    "the_duo": Modifier("The Duo", hand_xmult=_each(CONTAINS["Pair"], 2)),
+    "the_tribe": Modifier("The Tribe", hand_xmult=_each(CONTAINS["Flush"], 2)),
+    "scholar": Modifier("Scholar", rank_chips={1: 20}, rank_mult={1: 4}),
+    "fibonacci": Modifier("Fibonacci", rank_mult={rank: 8 for rank in (1, 2, 3, 5, 8)}),
+    "greedy": Modifier("Greedy Joker", suit_mult={"diamonds": 3}),
+    "lusty": Modifier("Lusty Joker", suit_mult={"hearts": 3}),
+    "wrathful": Modifier("Wrathful Joker", suit_mult={"spades": 3}),
+    "gluttonous": Modifier("Gluttonous Joker", suit_mult={"clubs": 3}),
+}
+
+def bonus_card(rank, suit):
+    """Bonus card enhancement: +30 chips when that card scores"""
+    return Modifier(f"Bonus {rank}:{suit}", card_chips={(rank, suit): 30})
+
+def mult_card(rank, suit):
+    """Mult card enhancement: +4 mult when that card scores"""
+    return Modifier(f"Mult {rank}:{suit}", card_mult={(rank, suit): 4})
+
+def resolve(modifiers):
+    """Modifier objects from a mix of modifiers and MODIFIERS names"""
+    unknown = [m for m in modifiers or [] if isinstance(m, str) and m not in MODIFIERS]
+    if unknown:
+        raise ValueError(f"unknown modifiers {unknown}; known: {sorted(MODIFIERS)}")
+    return [MODIFIERS[m] if isinstance(m, str) else m for m in modifiers or []]
+
+def modifier_rules(modifiers):
+    """The base game rules with the modifiers applied, as taken by codegen.load_evaluator"""
+    rules = default_rules()
+    rules["modifiers"] = [modifier.to_dict() for modifier in resolve(modifiers)]
+    return rules
+
+def load_scoring(modifiers):
+    """Evaluator module for a set of active modifiers (generated and cached on first use)"""
+    return load_evaluator(modifier_rules(modifiers))
+
+def _scoring_cards(name, cards):
+    """The played cards whose chips count towards the hand in Player.checkScoreReference, for any number of cards"""
+    if name in ("Straight Flush", "Flush"):
+        return list(cards)
+    if name == "High Card":
+        return [max(cards, key=lambda card: (card.chips, card.rank))] if cards else []
+    by_rank = {}
+    for card in cards:
+        by_rank.setdefault(card.rank, []).append(card)
+    if name == "Straight":
+        # One card of each rank of the straight: 10-A, or five down from the highest rank
+        ranks = sorted(by_rank, reverse=True)
+        straight = {1, 10, 11, 12, 13} if set(ranks) == {1, 10, 11, 12, 13} else {ranks[0] - i for i in range(5)}
+        return [by_rank[rank][0] for rank in ranks if rank in straight]
+    chips = lambda rank: (by_rank[rank][0].chips, rank)
+    if name == "Full House":
+        triple = max((r for r, group in by_rank.items() if len(group) >= 3), key=chips)
+        pair = max((r for r, group in by_rank.items() if r != triple and len(group) >= 2), key=chips)
+        return by_rank[triple][:3] + by_rank[pair][:2]
+    size = {"Four of a Kind": 4, "Triple": 3, "Two Pair": 2, "Pair": 2}[name]
+    groups = sorted((r for r, group in by_rank.items() if len(group) >= size), key=chips, reverse=True)
+    groups = groups[:2] if name == "Two Pair" else groups[:1]
+    return [card for rank in groups for card in by_rank[rank][:size]]
+
+_combined = {} # rules hash -> combined modifiers of an evaluator module
+
+def score_with_modifiers(scoring, cards, name, score):
+    """
+    (hand name, score) of a play the evaluator tables do not cover, from its name and score
+    under the base rules plus the modifiers of the evaluator module `scoring`
+    """
+    rules = json.loads(scoring.RULES)
+    combined = _combined.get(scoring.RULES_HASH)
+    if combined is None:
+        combined = _combined[scoring.RULES_HASH] = combine_modifiers(rules.get("modifiers", []))
+    base, mult = rules["hands"][name]
+    # The base rules score (base + card chips) * mult
+    chips = score // mult + combined["hand_chips"].get(name, 0)
+    mult += combined["hand_mult"].get(name, 0)
+    for card in _scoring_cards(name, cards):
+        card_chips, card_mult = combined["card"].get((card.rank, card.suit), (0, 0))
+        chips += combined["rank_chips"].get(card.rank, 0) + card_chips
+        mult += combined["rank_mult"].get(card.rank, 0) + card_mult
+    return name, final_score(chips, mult, combined["hand_xmult"].get(name, 1))
@@ -1,11 +1,49 @@
-from card import Card
-from deck import Deck
+import random
+
+try:
+    from .card import Card
+    from .deck import Deck
+except ImportError: # running from inside the Simulation folder
+    from card import Card
+    from deck import Deck
 
 TARGET_SCORE = 600
 
+# Base chips and multiplier of each hand. The reference scoring below and the generated
+# evaluator (codegen.default_rules) both read them from here, so a change to them also changes
+# the rules hash and regenerates the evaluator.
+HAND_RULES = {
+    "High Card": (5, 1),
+    "Pair": (10, 2),
+    "Two Pair": (20, 2),
+    "Triple": (30, 3),
+    "Straight": (30, 4),
+    "Flush": (35, 4),
+    "Full House": (40, 4),
+    "Four of a Kind": (60, 7),
+    "Straight Flush": (100, 8),
+}
+
+_evaluator = None
+
+def evaluator():
+    """Evaluator generated from the base game rules (see codegen.py), loaded on first use"""
+    global _evaluator
+    if _evaluator is None:
+        try:
+            from .codegen import load_evaluator
+        except ImportError: # running from inside the Simulation folder
+            from codegen import load_evaluator
+        _evaluator = load_evaluator()
+    return _evaluator
+
 class Player:
-    def __init__(self, strategy):
+    scoring = None # evaluator for the active modifiers; None scores by the base game rules
+
+    def __init__(self, strategy, modifiers=None):
         self.strategy = strategy
+        if modifiers:
+            self.set_modifiers(modifiers)
         self.deck = Deck()
         self.deck.shuffle()
         self.hand = []
@@ -16,12 +54,57 @@ class Player:
         self.playable_hands = ["High Card", "Pair", "Two Pair", "Triple", "Straight", "Flush", "Full House", "Four of a Kind", "Straight Flush"]
         self.history = [] # Stores tuples of (played_cards, played_hand_name, score)
         self.target_hand = strategy.target_hand
+        self._draw_hand()
+
+    def _draw_hand(self):
         for i in range(8):
             card = self.deck.draw()
             if card: # Check if draw was successful
                 self.hand.append(card)
+
+    def reset(self, seed=None, order=None):
+        """
+        Starts a new game with the same player, deck and strategy instead of building new ones
+        If a seed is given, the random module is seeded first, like random.seed(seed) before Player(...)
+        If an order is given, the deck is set to it instead of shuffled (the last 8 cards are the opening hand)
+        """
+        if seed is not None:
+            random.seed(seed)
+        self.deck.reset(order)
+        self.hand.clear()
+        self.playsRemaining = 4
+        self.discardsRemaining = 4
+        self.currentScore = 0
+        self.remainingPlaysToWin = 0
+        # A new list, since the previous game's results still refer to the old one
+        self.history = []
+        self._draw_hand()
     
+    def set_modifiers(self, modifiers):
+        """Scores every hand from now on with the given jokers/enhancements (see modifiers.py); kept across reset"""
+        try:
+            from .modifiers import load_scoring
+        except ImportError: # running from inside the Simulation folder
+            from modifiers import load_scoring
+        self.scoring = load_scoring(modifiers) if modifiers else None
+
     def checkScore(self, playing_hand):
+        # Hands of 1 to 5 cards are a table lookup in the generated evaluator
+        result = (self.scoring or _evaluator or evaluator()).evaluate(playing_hand)
+        if result is not None:
+            return result
+        name, score = Player.checkScoreReference(self, playing_hand)
+        if self.scoring is not None:
+            # Longer plays are not in the tables: score them by the base rules, then add the modifiers
+            try:
+                from .modifiers import score_with_modifiers
+            except ImportError: # running from inside the Simulation folder
+                from modifiers import score_with_modifiers
+            return score_with_modifiers(self.scoring, playing_hand, name, score)
+        return name, score
+
+    def checkScoreReference(self, playing_hand):
+        """Scores any hand directly from the hand definitions; the generated evaluator must agree with this"""
         score = 0
 
         # Helper function to get card counts by rank
@@ -50,16 +133,14 @@ class Player:
 
         def scoreHighCard(hand):
             score = 0
-            base_score = 5
-            multiplier = 1
+            base_score, multiplier = HAND_RULES["High Card"]
             if not hand: return 0
             high_card = max(hand, key=lambda x: x.chips)
             score = (base_score + high_card.chips) * multiplier
             return score
 
         def scorePair(hand):
-            base_score = 10
-            multiplier = 2
+            base_score, multiplier = HAND_RULES["Pair"]
             if len(hand) < 2: return 0
             
             cardCount = get_rank_counts(hand)
@@ -74,8 +155,7 @@ class Player:
             return (base_score + highest_pair_chips * 2) * multiplier
 
         def scoreTwoPair(hand):
-            base_score = 20
-            multiplier = 2
+            base_score, multiplier = HAND_RULES["Two Pair"]
             if len(hand) < 4: return 0
 
             cardCount = get_rank_counts(hand)
@@ -94,8 +174,7 @@ class Player:
             return (base_score + highest_pair * 2 + second_highest_pair * 2) * multiplier
             
         def scoreTriple(hand):
-            base_score = 30
-            multiplier = 3
+            base_score, multiplier = HAND_RULES["Triple"]
             if len(hand) < 3: return 0
 
             cardCount = get_rank_counts(hand)
@@ -110,8 +189,7 @@ class Player:
             return (base_score + highest_triple_chips * 3) * multiplier
 
         def scoreStraight(hand):
-            base_score = 30
-            multiplier = 4
+            base_score, multiplier = HAND_RULES["Straight"]
             if len(hand) < 5: return 0
 
             ranks = sorted(list(set([card.rank for card in hand])), reverse=True) # Unique sorted ranks
@@ -143,8 +221,7 @@ class Player:
             return 0
 
         def scoreFlush(hand):
-            base_score = 35
-            multiplier = 4
+            base_score, multiplier = HAND_RULES["Flush"]
             if len(hand) < 5: return 0
 
             suitCount = get_suit_counts(hand)
@@ -157,8 +234,7 @@ class Player:
             return 0
 
         def scoreFullHouse(hand):
-            base_score = 40
-            multiplier = 4
+            base_score, multiplier = HAND_RULES["Full House"]
             if len(hand) < 5: return 0
 
             cardCount = get_rank_counts(hand)
@@ -186,8 +262,7 @@ class Player:
             return (base_score + highest_triple_chips * 3 + highest_pair_chips * 2) * multiplier
                     
         def scoreFourOfAKind(hand):
-            base_score = 60
-            multiplier = 7
+            base_score, multiplier = HAND_RULES["Four of a Kind"]
             if len(hand) < 4: return 0
 
             cardCount = get_rank_counts(hand)
@@ -202,8 +277,7 @@ class Player:
             return (base_score + four_chips * 4) * multiplier
 
         def scoreStraightFlush(hand):
-            base_score = 100
-            multiplier = 8
+            base_score, multiplier = HAND_RULES["Straight Flush"]
             if len(hand) < 5: return 0
             
             suitCount = get_suit_counts(hand)
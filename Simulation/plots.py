@@ -0,0 +1,134 @@
+import os
+import matplotlib.pyplot as plt
+import matplotlib as mpl
+
+# Boxplots of the result metrics, drawn from sketch statistics rather than raw arrays.
+# This module imports matplotlib, so the simulation code never imports it.
+
+# Set up a professional font that resembles LaTeX without requiring LaTeX installation
+plt.rcParams.update({
+    "font.family": "cmr10",  # or try "Computer Modern"
+    "mathtext.fontset": "cm",
+    "axes.labelsize": 20,    # Increased from 14
+    "axes.titlesize": 18,    # Increased from 16
+    "xtick.labelsize": 14,   # Increased from 12
+    "ytick.labelsize": 14    # Increased from 12
+})
+
+# Different hatch patterns for strategies
+hatches = ['/', 
+        #    '\\', 
+           'x', 
+           'o', 
+        #    '.', 
+        #    '*', 
+        #    '+'
+           ]
+
+legend_hatches = ['//', 
+        #    '\\', 
+           'xx', 
+           'oo', 
+        #    '.', 
+        #    '*', 
+        #    '+'
+           ]
+
+def plot_boxplots(all_sketches, plots_dir):
+    """Saves one boxplot per metric comparing every strategy; returns the number of plots"""
+    # Get all unique metrics
+    all_columns = []
+    for sketch in all_sketches.values():
+        all_columns.extend(sketch.metrics)
+    unique_columns = sorted(set(all_columns))
+
+    # Create directory for saving plots if it doesn't exist
+    if not os.path.exists(plots_dir):
+        os.makedirs(plots_dir)
+
+    # Process each column in a separate plot
+    for column in unique_columns:
+        # Create a figure with appropriate size
+        fig, ax = plt.subplots(figsize=(12, 6))  # Reduced from (12, 8)
+    
+        # Prepare boxplot statistics for this column across all strategies
+        column_data = []
+        strategy_names = []
+    
+        for strategy_name, sketch in all_sketches.items():
+            if column in sketch.metrics:
+                column_data.append(sketch.metrics[column].boxplot_stats(label=strategy_name))
+                strategy_names.append(strategy_name)
+    
+        # Box plot styling - monochrome with hatches
+        box_props = dict(linestyle=':', linewidth=1, color='black')  # Changed to dotted line
+        whisker_props = dict(linestyle='-', linewidth=2.0, color='black')
+        cap_props = dict(linestyle='-', linewidth=2.0, color='black')
+        median_props = dict(linestyle='-', linewidth=2.5, color='black')
+        flier_props = dict(marker='o', markerfacecolor='none', markersize=6,
+                           markeredgecolor='black', linestyle='none')
+        mean_props = {'linestyle':'--', "dashes":(4,3.2), 'linewidth':2.5, 'color':'black'}
+    
+        # Draw a box plot for this column's results with improved styling
+        boxplot = ax.bxp(column_data, 
+                            patch_artist=True,
+                            boxprops=box_props,
+                            whiskerprops=whisker_props,
+                            capprops=cap_props,
+                            medianprops=median_props,
+                            flierprops=flier_props,
+                            showmeans=True,
+                            meanline=True,
+                            widths=0.7,
+                            meanprops=mean_props)
+    
+        # Apply hatches to boxes instead of colors
+        for patch, hatch in zip(boxplot['boxes'], hatches[:len(column_data)]):
+            patch.set_facecolor('white')
+            patch.set_hatch(hatch)
+            patch.set_edgecolor('black')
+    
+        # Horizontal x-axis labels
+        plt.xticks(rotation=0)
+    
+        # Add title and labels with better formatting
+        plt.ylabel(column, fontweight='bold')
+        plt.xlabel('Strategy', fontweight='bold')
+    
+        # Add a subtle grid for better readability
+        ax.yaxis.grid(True, linestyle='--', alpha=0.7)
+        ax.set_axisbelow(True)
+    
+        # Add a light border around the plot
+        for spine in ax.spines.values():
+            spine.set_edgecolor('black')
+            spine.set_linewidth(1.5)  # Increased from 1.0
+    
+        # Add legend for hatches with smaller patches
+        legend_patches = []
+        for i, (name, hatch) in enumerate(zip(strategy_names, legend_hatches[:len(strategy_names)])):
+            # Use smaller legend patches
+            patch = mpl.patches.Patch(facecolor='white', edgecolor='black', 
+                                     hatch=hatch, label=name)
+            legend_patches.append(patch)
+    
+        # Add mean and median to legend
+        mean_line = mpl.lines.Line2D([], [], color='black', linestyle='--', dashes=(4,3), 
+                                   linewidth=1.5, label='Mean')
+        median_line = mpl.lines.Line2D([], [], color='black', linestyle='-', 
+                                    linewidth=1.5, label='Median')
+        legend_patches.extend([mean_line, median_line])
+    
+        # Smaller legend
+        ax.legend(handles=legend_patches, loc='upper right', frameon=True, 
+                  facecolor='white', edgecolor='black', prop={'size': 13},
+                  handlelength=2.5, handleheight=2.5, borderpad=0.5)
+    
+        # Improve layout
+        plt.tight_layout()
+        # Save the plot with the column name
+        safe_column_name = column.replace(' ', '_').lower()
+        plt.savefig(f'{plots_dir}/{safe_column_name}_boxplot.pdf', dpi=300, bbox_inches='tight')
+        plt.close()
+
+    return len(unique_columns)
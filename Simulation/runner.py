@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+import random
+from array import array
+
+try:
+    from . import memo
+    from .strategicPlayer import StrategicPlayer
+    from .strategy import FlushStrategy, StraightStrategy, FullHouse4CardsStrategy, RolloutStrategy
+    from .player import TARGET_SCORE
+    from .sketch import StrategySketch
+except ImportError: # running from inside the Simulation folder
+    import memo
+    from strategicPlayer import StrategicPlayer
+    from strategy import FlushStrategy, StraightStrategy, FullHouse4CardsStrategy, RolloutStrategy
+    from player import TARGET_SCORE
+    from sketch import StrategySketch
+
+# Strategies by the file stem used in the Results folder
+STRATEGIES = {
+    "flush": FlushStrategy,
+    "straight": StraightStrategy,
+    "full_house": FullHouse4CardsStrategy,
+    "rollout": RolloutStrategy,
+}
+
+METRICS = ["Won", "Score", "Remaining_plays", "Target_hand_ratio"]
+
+def strategy_label(key):
+    """Label used in plots and tables, e.g. 'full_house' -> 'Full House'"""
+    return key.replace('_', ' ').title()
+
+def game_row(player, results):
+    """The row the notebooks store in their DataFrames for one finished game"""
+    history = results["history"]
+    target_hand = player.target_hand
+    if not target_hand and hasattr(player.strategy, "base"):
+        # The rollout strategy has no target hands of its own (so it is asked about every decision): use its base strategy's
+        target_hand = player.strategy.base.target_hand
+    target_hands_ratio = len([hand for hand in history if hand[1] in target_hand]) / len(history) if history else 0.0
+    return {"Won": 1 if results["score"] >= TARGET_SCORE else 0,
+            "Score": results["score"],
+            "Remaining_plays": results["remainingPlaysToWin"],
+            "Target_hand_ratio": target_hands_ratio}
+
+def play_game(strategy_class, seed):
+    """Plays one seeded game and returns its row"""
+    random.seed(seed)
+    player = StrategicPlayer(strategy_class())
+    return game_row(player, player.play_strategically())
+
+def column_path(columns_dir, key, start, stop):
+    return os.path.join(columns_dir, key, f"{start:010d}-{stop:010d}.f64")
+
+def write_columns(path, seeds, rows):
+    """
+    Per-game results of one chunk as a column-major float64 file: the seeds, then one column
+    per metric in METRICS order. Written to a temporary name first so readers never see half a chunk.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = array('d', seeds)
+    for metric in METRICS:
+        data.extend(row[metric] for row in rows)
+    with open(path + ".tmp", "wb") as f:
+        data.tofile(f)
+    os.replace(path + ".tmp", path)
+
+def run_chunk(args):
+    """
+    Plays seeds [start, stop) for one strategy and returns their sketch.
+    With a fourth element (a directory), the per-game rows are also written there as columns.
+    A fifth element lists the active modifiers (names from modifiers.MODIFIERS).
+    """
+    key, start, stop = args[:3]
+    columns_dir = args[3] if len(args) > 3 else None
+    modifiers = args[4] if len(args) > 4 else None
+    sketch = StrategySketch(strategy_label(key), METRICS)
+    rows = []
+    # One player (and strategy) for the whole chunk, reset for every seed
+    player = None
+    for seed in range(start, stop):
+        if player is None:
+            random.seed(seed)
+            player = StrategicPlayer(STRATEGIES[key](), modifiers)
+        else:
+            player.reset(seed)
+        row = game_row(player, player.play_strategically())
+        sketch.update(row)
+        if columns_dir:
+            rows.append(row)
+    if columns_dir:
+        write_columns(column_path(columns_dir, key, start, stop), range(start, stop), rows)
+    return sketch
+
+def run_chunk_memo(args):
+    """run_chunk in a worker process; also returns what the worker's best-play cache learned (see memo.drain)"""
+    sketch = run_chunk(args)
+    return sketch, memo.cache().drain()
+
+def run(key, iterations, start=0, workers=1, chunk_size=250, progress=None, columns_dir=None, modifiers=None):
+    """
+    Plays seeds [start, start + iterations) with the given strategy and returns the merged sketch.
+    Chunks are summarized by the workers, so only sketches cross process boundaries.
+    progress(sketch, games_done) is called after every merged chunk and can be used to
+    watch a run while it is still going.
+    columns_dir: if given, workers also write every game's row there (see write_columns),
+    for analyses that need paired per-game results such as bootstrap.py.
+    modifiers: names of jokers/enhancements active in every game (see modifiers.py).
+    """
+    chunks = [(key, lo, min(lo + chunk_size, start + iterations), columns_dir, modifiers)
+              for lo in range(start, start + iterations, chunk_size)]
+    total = StrategySketch(strategy_label(key), METRICS)
+
+    def merge(sketch):
+        total.merge(sketch)
+        if progress:
+            progress(total, total.games)
+
+    if workers > 1:
+        # Imported here so single-process runs do not pay for multiprocessing at startup
+        from multiprocessing import Pool
+        best_plays = memo.cache()
+        if best_plays is None:
+            with Pool(workers) as pool:
+                for sketch in pool.imap_unordered(run_chunk, chunks):
+                    merge(sketch)
+        else:
+            # Whatever the best-play cache holds now is shared read-only by the forked workers,
+            # and what they learn comes back with every chunk
+            best_plays.freeze()
+            with Pool(workers) as pool:
+                for sketch, learned in pool.imap_unordered(run_chunk_memo, chunks):
+                    best_plays.absorb(*learned)
+                    merge(sketch)
+    else:
+        for chunk in chunks:
+            merge(run_chunk(chunk))
+    return total
+
+def save_sketch(sketch, path):
+    with open(path, "w") as f:
+        json.dump(sketch.to_dict(), f)
+
+def load_sketch(path):
+    with open(path) as f:
+        return StrategySketch.from_dict(json.load(f))
+
+def merge_sketch_files(paths):
+    """Combines sketches written by separate runs (e.g. different seed ranges) of the same strategy"""
+    total = None
+    for path in paths:
+        sketch = load_sketch(path)
+        total = sketch if total is None else total.merge(sketch)
+    return total
+
+def summary_table(sketches):
+    """Rows of (strategy, metric, summary dict) in the spirit of DataFrame.describe()"""
+    return [(sketch.strategy, metric, metric_sketch.summary())
+            for sketch in sketches for metric, metric_sketch in sketch.metrics.items()]
+
+def format_summary(all_sketches):
+    """Text table of the summary statistics of every strategy and metric"""
+    lines = [f"{'Strategy':<12}{'Metric':<20}{'count':>8}{'mean':>10}{'std':>10}{'25%':>10}{'50%':>10}{'75%':>10}"]
+    for strategy_name, metric, s in summary_table(all_sketches.values()):
+        lines.append(f"{strategy_name:<12}{metric:<20}{s['count']:>8}{s['mean']:>10.3f}{s['std']:>10.3f}"
+                     f"{s['25%']:>10.3f}{s['50%']:>10.3f}{s['75%']:>10.3f}")
+    return "\n".join(lines)
+
+def sketch_from_csv(path, strategy_name):
+    """Streams a saved results CSV into a sketch, one row at a time"""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        columns = [col for col in reader.fieldnames if col != 'Strategy']
+        sketch = StrategySketch(strategy_name, columns)
+        for row in reader:
+            sketch.update({col: float(row[col]) for col in columns})
+    return sketch
+
+def load_result_sketches(result_paths):
+    """
+    One sketch per strategy found in a results folder.
+    Sketches written by the runner take precedence over CSVs of the same strategy.
+    """
+    sketch_files = sorted(f for f in os.listdir(result_paths) if f.endswith('_sketch.json'))
+    result_files = sorted(f for f in os.listdir(result_paths) if f.endswith('.csv'))
+
+    all_sketches = {}
+    for file in sketch_files:
+        sketch = load_sketch(os.path.join(result_paths, file))
+        all_sketches[sketch.strategy] = sketch
+    for file in result_files:
+        # Clean up file names for better labels, e.g. 'full_house_df.csv' -> 'Full House'
+        strategy_name = strategy_label(os.path.splitext(file)[0]).replace(' Df', '')
+        if strategy_name not in all_sketches:
+            all_sketches[strategy_name] = sketch_from_csv(os.path.join(result_paths, file), strategy_name)
+    return all_sketches
@@ -0,0 +1,332 @@
+import math
+import random
+from math import comb
+
+try:
+    from .deck import CARDS
+    from .player import TARGET_SCORE
+    from .runner import STRATEGIES
+    from .strategicPlayer import StrategicPlayer
+except ImportError: # running from inside the Simulation folder
+    from deck import CARDS
+    from player import TARGET_SCORE
+    from runner import STRATEGIES
+    from strategicPlayer import StrategicPlayer
+
+# Variance reduction for win probabilities that are too small for plain Monte Carlo.
+# Games are grouped by the class of their opening 8-card hand, described either by its suit
+# profile (how many cards of each suit, e.g. (4, 2, 1, 1)) or by its rank profile (how many
+# cards of each rank, e.g. (2, 2, 1, 1, 1, 1)). The probability of every class is known
+# exactly, and a deck can be dealt uniformly at random from within any class, so:
+# - stratified_estimate plays a chosen number of games in every class and weights the class
+#   win rates by the exact class probabilities;
+# - importance_estimate deals classes from a proposal distribution tilted towards classes
+#   that win more often, and weights each game by the likelihood ratio p(class) / q(class).
+# tilted_estimate instead tilts the deck order itself: the first draws favour cards that make the
+# strategy's best hands, and each game is weighted by the product of the per-draw likelihood ratios.
+# All are unbiased and report the variance of their estimate. Their pilot games are counted in
+# the cost, and every result carries the standard error plain Monte Carlo would have with the same
+# total number of games, so the gain (or loss) is visible. Pilot win rates are shrunk towards the
+# pooled pilot rate: a class that happened not to win in the pilot is neither starved of games
+# nor given likelihood ratios that blow up the variance.
+
+SUITS = ['hearts', 'diamonds', 'clubs', 'spades']
+HAND_SIZE = 8
+KINDS = ("suits", "ranks")
+
+def _partitions(n, max_part, max_parts):
+    """Partitions of n into at most max_parts parts of size at most max_part, largest part first"""
+    if n == 0:
+        yield ()
+        return
+    if max_parts == 0:
+        return
+    for part in range(min(n, max_part), 0, -1):
+        for rest in _partitions(n - part, part, max_parts - 1):
+            yield (part,) + rest
+
+def _arrangements(profile, slots):
+    """Ways to assign the parts of a profile to distinct slots (suits or ranks), zeros included"""
+    counts = {}
+    for part in profile:
+        counts[part] = counts.get(part, 0) + 1
+    counts[0] = slots - len(profile)
+    ways = math.factorial(slots)
+    for count in counts.values():
+        ways //= math.factorial(count)
+    return ways
+
+def class_probabilities(kind="suits"):
+    """Exact probability of every opening-hand class of the given kind"""
+    total = comb(52, HAND_SIZE)
+    probabilities = {}
+    if kind == "suits":
+        for profile in _partitions(HAND_SIZE, 13, 4):
+            hands = _arrangements(profile, 4) * math.prod(comb(13, k) for k in profile)
+            probabilities[profile] = hands / total
+    elif kind == "ranks":
+        for profile in _partitions(HAND_SIZE, 4, 13):
+            hands = _arrangements(profile, 13) * math.prod(comb(4, k) for k in profile)
+            probabilities[profile] = hands / total
+    else:
+        raise ValueError(f"kind must be one of {KINDS}")
+    return probabilities
+
+def hand_class(hand, kind="suits"):
+    counts = {}
+    for card in hand:
+        key = card.suit if kind == "suits" else card.rank
+        counts[key] = counts.get(key, 0) + 1
+    return tuple(sorted(counts.values(), reverse=True))
+
+def deal_order(kind, profile, rng):
+    """A deck order whose opening hand is uniformly distributed within the class"""
+    if kind == "suits":
+        suits = rng.sample(SUITS, 4)
+        hand = [card for suit, k in zip(suits, profile)
+                for card in rng.sample([c for c in CARDS if c.suit == suit], k)]
+    else:
+        ranks = rng.sample(range(1, 14), len(profile))
+        hand = [card for rank, k in zip(ranks, profile)
+                for card in rng.sample([c for c in CARDS if c.rank == rank], k)]
+    rng.shuffle(hand)
+    rest = [card for card in CARDS if card not in hand]
+    rng.shuffle(rest)
+    # Cards are drawn from the end of the deck, so the hand goes last
+    return rest + hand
+
+def play_class(args):
+    """Wins in games [start, stop) dealt from one class; game i uses its own seeded generator"""
+    key, kind, profile, start, stop, seed, target = args
+    player = None
+    wins = 0
+    for i in range(start, stop):
+        rng = random.Random(f"{seed}:{kind}:{profile}:{i}")
+        order = deal_order(kind, profile, rng)
+        if player is None:
+            player = StrategicPlayer(STRATEGIES[key]())
+        player.reset(order=order)
+        player.play_strategically()
+        wins += player.currentScore >= target
+    return wins
+
+def _play(jobs, workers, play=play_class):
+    if workers > 1:
+        from multiprocessing import Pool
+        with Pool(workers) as pool:
+            return pool.map(play, jobs)
+    return [play(job) for job in jobs]
+
+def _class_jobs(key, kind, counts, offsets, seed, target, chunk_size=100):
+    """Splits each class's games into chunks; returns the jobs and the class each one belongs to"""
+    jobs = []
+    for profile, n in counts.items():
+        start = offsets.get(profile, 0)
+        for lo in range(start, start + n, chunk_size):
+            jobs.append((key, kind, profile, lo, min(lo + chunk_size, start + n), seed, target))
+    return jobs
+
+def _pilot(key, kind, per_class, seed, target, workers):
+    """
+    Win rate of every class from a small equal allocation, shrunk towards the pooled rate by
+    `per_class` pseudo-games; None if the pilot games all lost (or all won) and cannot tell the classes apart
+    """
+    probabilities = class_probabilities(kind)
+    counts = {profile: per_class for profile in probabilities}
+    jobs = _class_jobs(key, kind, counts, {}, f"pilot-{seed}", target)
+    wins = {profile: 0 for profile in probabilities}
+    for job, w in zip(jobs, _play(jobs, workers)):
+        wins[job[2]] += w
+    pooled = sum(wins.values()) / (per_class * len(probabilities))
+    if pooled in (0, 1):
+        return None
+    return {profile: (wins[profile] + per_class * pooled) / (2 * per_class) for profile in probabilities}
+
+def _pilot_games(kind, per_class):
+    return per_class * len(class_probabilities(kind))
+
+def _compare_plain(result, pilot_games):
+    """Adds the cost and the standard error of plain Monte Carlo with as many games in total"""
+    estimate = min(max(result["estimate"], 0.0), 1.0)
+    total = result["games"] + pilot_games
+    plain_variance = estimate * (1 - estimate) / total
+    result["pilot_games"] = pilot_games
+    result["total_games"] = total
+    result["plain_std_error"] = math.sqrt(plain_variance)
+    # Variance of plain Monte Carlo over ours at equal cost: above 1 means fewer games for the same precision
+    result["efficiency"] = plain_variance / result["variance"] if result["variance"] > 0 else math.nan
+    return result
+
+def stratified_estimate(key, n, kind="suits", target=TARGET_SCORE, allocation="neyman", pilot_per_class=20,
+                        min_per_class=2, seed=0, workers=1):
+    """
+    Win probability from n games stratified by opening-hand class.
+    allocation: "proportional" (games follow the class probabilities) or "neyman" (games follow
+    probability x standard deviation, using a pilot run that is not part of the estimate).
+    """
+    probabilities = class_probabilities(kind)
+    pilot = _pilot(key, kind, pilot_per_class, seed, target, workers) if allocation == "neyman" else None
+    pilot_games = _pilot_games(kind, pilot_per_class) if allocation == "neyman" else 0
+    if pilot is not None:
+        weights = {h: w * math.sqrt(pilot[h] * (1 - pilot[h])) for h, w in probabilities.items()}
+    else:
+        # Proportional, also when the pilot cannot tell the classes apart
+        weights = dict(probabilities)
+    total_weight = sum(weights.values())
+    counts = {h: max(min_per_class, round(n * weight / total_weight)) for h, weight in weights.items()}
+
+    jobs = _class_jobs(key, kind, counts, {}, seed, target)
+    wins = {h: 0 for h in probabilities}
+    for job, w in zip(jobs, _play(jobs, workers)):
+        wins[job[2]] += w
+
+    estimate = 0.0
+    variance = 0.0
+    strata = []
+    for h, w in probabilities.items():
+        p = wins[h] / counts[h]
+        estimate += w * p
+        variance += w * w * p * (1 - p) / max(counts[h] - 1, 1)
+        strata.append({"class": h, "probability": w, "games": counts[h], "wins": wins[h], "win_rate": p})
+    result = {"estimate": estimate, "variance": variance, "std_error": math.sqrt(variance),
+              "games": sum(counts.values()), "strata": strata}
+    return _compare_plain(result, pilot_games)
+
+def importance_estimate(key, n, kind="suits", target=TARGET_SCORE, proposal=None, pilot_per_class=20,
+                        defensive=0.1, seed=0, workers=1):
+    """
+    Win probability from n games whose opening-hand classes are drawn from a proposal q.
+    Each game counts with weight p(class) / q(class). By default q is proportional to
+    p(class) * sqrt(pilot win rate), mixed with p itself (the `defensive` share) so that no class
+    gets a vanishing proposal probability; q is p when the pilot cannot tell the classes apart. A proposal passed in
+    is normalized to sum to 1.
+    """
+    probabilities = class_probabilities(kind)
+    pilot_games = 0
+    if proposal is None:
+        pilot = _pilot(key, kind, pilot_per_class, seed, target, workers)
+        pilot_games = _pilot_games(kind, pilot_per_class)
+        if pilot is None:
+            proposal = dict(probabilities)
+        else:
+            tilted = {h: w * math.sqrt(pilot[h]) for h, w in probabilities.items()}
+            total = sum(tilted.values())
+            proposal = {h: (1 - defensive) * tilted[h] / total + defensive * w for h, w in probabilities.items()}
+    else:
+        missing = [h for h, w in probabilities.items() if w > 0 and proposal.get(h, 0) <= 0]
+        if missing:
+            raise ValueError(f"the proposal must give every class a positive probability, not {missing}")
+        total = sum(proposal[h] for h in probabilities)
+        proposal = {h: proposal[h] / total for h in probabilities}
+
+    # Class of every game, drawn from the proposal
+    rng = random.Random(f"{seed}:proposal")
+    profiles = list(probabilities)
+    draws = rng.choices(profiles, weights=[proposal[h] for h in profiles], k=n)
+    counts = {h: draws.count(h) for h in profiles if draws.count(h)}
+
+    jobs = _class_jobs(key, kind, counts, {}, seed, target)
+    wins = {h: 0 for h in counts}
+    for job, w in zip(jobs, _play(jobs, workers)):
+        wins[job[2]] += w
+
+    # Weighted indicator of each game: p/q for a win, 0 for a loss
+    total = 0.0
+    total_sq = 0.0
+    for h, games in counts.items():
+        ratio = probabilities[h] / proposal[h]
+        total += wins[h] * ratio
+        total_sq += wins[h] * ratio * ratio
+    estimate = total / n
+    variance = (total_sq / n - estimate * estimate) / max(n - 1, 1)
+    result = {"estimate": estimate, "variance": variance, "std_error": math.sqrt(max(variance, 0.0)),
+              "games": n, "proposal": proposal}
+    return _compare_plain(result, pilot_games)
+
+# Groups of cards the draw-order tilt can over-weight for each strategy: the straight flushes
+# (one suit, one 5-rank window) for flush, whose wins at high targets mostly come from one,
+# the 5-rank windows for straight, the ranks for full house. Every tilted game picks one group
+# at random, so the proposal is an equal mixture over the groups; any choice of groups keeps the
+# estimate unbiased, and a good one makes winning deals more likely under the tilt.
+_WINDOWS = [(1, 2, 3, 4, 5)] + [tuple(range(low, low + 5)) for low in range(2, 10)] + [(10, 11, 12, 13, 1)]
+TILT_GROUPS = {
+    "flush": [{card for card in CARDS if card.suit == suit and card.rank in window} for suit in SUITS for window in _WINDOWS],
+    "straight": [{card for card in CARDS if card.rank in window} for window in _WINDOWS],
+    "full_house": [{card for card in CARDS if card.rank == rank} for rank in range(1, 14)],
+}
+
+def tilted_order(key, weight, draws, rng, defensive=0.0, groups=None):
+    """
+    A deck order whose first `draws` cards are drawn one at a time with probability proportional
+    to `weight` for the cards of one group (picked at random from `groups`, default TILT_GROUPS[key])
+    and 1 for the others; the rest is a uniform shuffle. With probability `defensive` no group is
+    picked and the whole order is uniform, which bounds the likelihood ratio by 1 / defensive.
+    Returns the order and its likelihood ratio p(order) / q(order), where q mixes p and, for every
+    group, the product over the tilted draws of (weight of the drawn card / total weight left).
+    """
+    groups = groups or TILT_GROUPS[key]
+    # With probability `defensive` the game is dealt without a tilt
+    group = set() if rng.random() < defensive else rng.choice(groups)
+    tilted = [card for card in CARDS if card in group]
+    others = [card for card in CARDS if card not in group]
+    drawn = []
+    for _ in range(draws):
+        total = weight * len(tilted) + len(others)
+        pool = tilted if rng.random() * total < weight * len(tilted) else others
+        drawn.append(pool.pop(rng.randrange(len(pool))))
+    rest = tilted + others
+    rng.shuffle(rest)
+
+    # q(order) / p(order) under the tilt towards every group, for the mixture
+    mixture = 0.0
+    for g in groups:
+        q_over_p = 1.0
+        in_group = len(g)
+        for i, card in enumerate(drawn):
+            left = len(CARDS) - i
+            total = weight * in_group + left - in_group
+            if card in g:
+                q_over_p *= weight * left / total
+                in_group -= 1
+            else:
+                q_over_p *= left / total
+        mixture += q_over_p
+    # Cards are drawn from the end of the deck, so the first draw goes last
+    return rest + drawn[::-1], 1 / (defensive + (1 - defensive) * mixture / len(groups))
+
+def play_tilted(args):
+    """(sum, sum of squares) of the weighted win indicator over games [start, stop) dealt from the tilt"""
+    key, start, stop, seed, target, weight, draws, defensive, groups = args
+    player = StrategicPlayer(STRATEGIES[key]())
+    total = 0.0
+    total_sq = 0.0
+    for i in range(start, stop):
+        rng = random.Random(f"{seed}:tilt:{i}")
+        order, ratio = tilted_order(key, weight, draws, rng, defensive, groups)
+        player.reset(order=order)
+        player.play_strategically()
+        if player.currentScore >= target:
+            total += ratio
+            total_sq += ratio * ratio
+    return total, total_sq
+
+def tilted_estimate(key, n, target=TARGET_SCORE, weight=2.0, draws=12, defensive=0.1, groups=None, seed=0, workers=1,
+                    chunk_size=100):
+    """
+    Win probability from n games whose deck order is tilted towards groups of cards that make
+    the strategy's best hands (see TILT_GROUPS and tilted_order), each win weighted by its
+    likelihood ratio. Only the first `draws` cards are tilted: later draws are uniform and add
+    nothing to the ratio, which keeps its variance down. Needs no pilot games.
+    """
+    if key not in TILT_GROUPS:
+        raise ValueError(f"no draw-order tilt for {key}; choose from {sorted(TILT_GROUPS)}")
+    jobs = [(key, lo, min(lo + chunk_size, n), seed, target, weight, draws, defensive, groups)
+            for lo in range(0, n, chunk_size)]
+    sums = _play(jobs, workers, play_tilted)
+    total = sum(s for s, _ in sums)
+    total_sq = sum(s for _, s in sums)
+    estimate = total / n
+    variance = (total_sq / n - estimate * estimate) / max(n - 1, 1)
+    result = {"estimate": estimate, "variance": variance, "std_error": math.sqrt(max(variance, 0.0)),
+              "games": n, "weight": weight, "draws": draws}
+    return _compare_plain(result, 0)
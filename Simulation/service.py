@@ -0,0 +1,383 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import OrderedDict
+
+try:
+    from . import memo
+    from .deck import CARDS
+    from .kernel import GameKernel
+    from .player import TARGET_SCORE, evaluator
+    from .runner import STRATEGIES, strategy_label
+    from .sketch import MetricSketch
+except ImportError: # running from inside the Simulation folder
+    import memo
+    from deck import CARDS
+    from kernel import GameKernel
+    from player import TARGET_SCORE, evaluator
+    from runner import STRATEGIES, strategy_label
+    from sketch import MetricSketch
+
+# Advice over HTTP: POST a position (hand, rest of the deck, plays/discards left, score so far)
+# to /advise and get back, for every strategy, the action it takes and its estimated chance
+# of reaching the target from there.
+# Requests that arrive together are collected into a batch (up to max_batch requests or
+# max_wait_ms after the first one) and evaluated in one pass on a worker thread: identical
+# positions are evaluated once, and all strategies are played out on the same sampled deck
+# orders. Answers are deterministic for a position (the sampling is seeded from it), so they are
+# kept in an LRU cache; the evaluator tables and the best-play cache (memo.py) stay warm for
+# the life of the server. GET /metrics reports latency quantiles, throughput and cache hit rates.
+# Only the standard library is used; the HTTP handling covers what a JSON client needs
+# (Content-Length bodies, keep-alive), not the whole protocol.
+
+RANK_NAMES = {1: "A", 11: "J", 12: "Q", 13: "K"}
+SUIT_NAMES = {"hearts": "H", "diamonds": "D", "clubs": "C", "spades": "S"}
+CARD_CODES = {f"{RANK_NAMES.get(card.rank, card.rank)}{SUIT_NAMES[card.suit]}": card for card in CARDS}
+CODE_OF = {id(card): code for code, card in CARD_CODES.items()}
+
+# Strategies pick 5-card plays and discards from a full hand, so smaller hands are refused
+MIN_HAND, MAX_HAND = 5, 8
+MAX_ROLLOUTS = 5000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+DEFAULT_STRATEGIES = ["flush", "straight", "full_house"]
+# Strategies the endpoint plays out. The rollout strategy is left out: every one of its decisions
+# runs rollouts of its own, so a single request could keep the batch worker busy for minutes.
+ADVICE_STRATEGIES = DEFAULT_STRATEGIES
+
+def parse_card(code):
+    """'AS', '10H', 'qd' -> the deck's Card"""
+    card = CARD_CODES.get(str(code).upper())
+    if card is None:
+        raise ValueError(f"unknown card {code!r}; use rank (A, 2-10, J, Q, K) and suit (H, D, C, S), e.g. 'QS'")
+    return card
+
+def parse_position(request):
+    """Validated position of an /advise request, as a hashable tuple"""
+    hand = [parse_card(code) for code in request["hand"]]
+    if not MIN_HAND <= len(hand) <= MAX_HAND:
+        raise ValueError(f"hand must have {MIN_HAND} to {MAX_HAND} cards")
+    if "deck" in request:
+        deck = [parse_card(code) for code in request["deck"]]
+    else:
+        deck = [card for card in CARDS if card not in hand]
+    if len(set(map(id, hand + deck))) != len(hand) + len(deck):
+        raise ValueError("a card appears twice in hand and deck")
+    plays, discards = int(request.get("plays", 4)), int(request.get("discards", 4))
+    if plays < 0 or discards < 0:
+        raise ValueError("plays and discards cannot be negative")
+    # As in a real game, where 44 cards are left after the opening hand and every action uses at most 5
+    if len(deck) < 5 * (plays + discards):
+        raise ValueError(f"the deck needs at least {5 * (plays + discards)} cards to refill the hand for every play and discard left")
+    strategies = request.get("strategies", DEFAULT_STRATEGIES)
+    unknown = [key for key in strategies if key not in ADVICE_STRATEGIES]
+    if unknown:
+        raise ValueError(f"unknown strategies {unknown}; choose from {ADVICE_STRATEGIES}")
+    rollouts = int(request.get("rollouts", 200))
+    if not 0 <= rollouts <= MAX_ROLLOUTS:
+        raise ValueError(f"rollouts must be between 0 and {MAX_ROLLOUTS}")
+    # Hand order matters (actions are hand indices); deck order does not, it is resampled
+    return (tuple(CODE_OF[id(card)] for card in hand),
+            tuple(sorted(CODE_OF[id(card)] for card in deck)),
+            plays, discards, int(request.get("score", 0)),
+            int(request.get("target", TARGET_SCORE)), tuple(strategies), rollouts)
+
+def evaluate_batch(positions):
+    """
+    Advice for a batch of positions, in order. Each distinct position is evaluated once; its
+    strategies share one kernel each and are played out on the same deck orders.
+    A position that fails gets its exception in place of an answer, without failing the others.
+    """
+    kernels = {}
+    answers = {}
+    for position in positions:
+        if position in answers:
+            continue
+        try:
+            answers[position] = _evaluate(position, kernels)
+        except Exception as error:
+            answers[position] = error
+    return [answers[position] for position in positions]
+
+def _evaluate(position, kernels):
+    """Advice for one position, reusing the batch's kernel of every strategy"""
+    hand_codes, deck_codes, plays, discards, score, target, keys, rollouts = position
+    hand = [CARD_CODES[code] for code in hand_codes]
+    deck = [CARD_CODES[code] for code in deck_codes]
+    seed = hashlib.sha256(repr(position).encode()).hexdigest()
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(rollouts):
+        rng.shuffle(deck)
+        orders.append(list(deck))
+
+    advice = []
+    for key in keys:
+        kernel = kernels.get(key)
+        if kernel is None:
+            kernel = kernels[key] = GameKernel(STRATEGIES[key]())
+        strategy = kernel.strategy
+        if hasattr(strategy, "target"):
+            strategy.target = target
+        kernel.load(hand, deck, plays, discards, score, strategy)
+        action = kernel.choose_action() if score < target else None
+        wins = 0
+        for order in orders:
+            kernel.load(hand, order, plays, discards, score, strategy)
+            wins += kernel.finish(target) >= target
+        advice.append({
+            "strategy": strategy_label(key),
+            "action": action[0] if action else None,
+            "indices": list(action[1]) if action else [],
+            "cards": [hand_codes[i] for i in action[1]] if action else [],
+            "win_probability": wins / rollouts if rollouts else None,
+            "rollouts": rollouts,
+        })
+    return {"advice": advice}
+
+class AdviceService:
+    def __init__(self, host="127.0.0.1", port=8765, max_batch=8, max_wait_ms=5.0, cache_size=10000):
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.cache = OrderedDict() # position -> answer, least recently used first
+        self.cache_size = cache_size
+        self.counts = {"requests": 0, "errors": 0, "batches": 0, "cache_hits": 0, "cache_misses": 0, "in_flight_hits": 0}
+        self.in_flight = {} # position -> future of its answer, while it is queued or being evaluated
+        self.latency = MetricSketch() # milliseconds per /advise request
+        self.batch_sizes = MetricSketch()
+        self.server = None
+        self.address = None
+
+    async def start(self):
+        # Warm the evaluator tables and the best-play cache before the first request
+        evaluator()
+        if memo.cache() is None:
+            memo.enable()
+        self.started = time.monotonic()
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.create_task(self._batch_loop())
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.address = self.server.sockets[0].getsockname()[:2]
+        return self
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            positions = [position for position, _ in batch]
+            try:
+                # On a thread, so the event loop keeps accepting requests while a batch is evaluated
+                answers = await loop.run_in_executor(None, evaluate_batch, positions)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.counts["batches"] += 1
+            self.batch_sizes.update(len(batch))
+            for (position, future), answer in zip(batch, answers):
+                if isinstance(answer, Exception):
+                    if not future.done():
+                        future.set_exception(answer)
+                    continue
+                self._remember(position, answer)
+                if not future.done():
+                    future.set_result(answer)
+
+    def _remember(self, position, answer):
+        self.cache[position] = answer
+        self.cache.move_to_end(position)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def advise(self, request):
+        position = parse_position(request)
+        answer = self.cache.get(position)
+        if answer is not None:
+            self.cache.move_to_end(position)
+            self.counts["cache_hits"] += 1
+            return answer
+        future = self.in_flight.get(position)
+        if future is not None:
+            # Already queued or being evaluated for another request: share its answer
+            self.counts["in_flight_hits"] += 1
+        else:
+            self.counts["cache_misses"] += 1
+            future = self.in_flight[position] = asyncio.get_running_loop().create_future()
+            future.add_done_callback(lambda _: self.in_flight.pop(position, None))
+            await self.queue.put((position, future))
+        try:
+            return await future
+        except Exception as error:
+            # The request was valid, so a failure while evaluating it is the server's (500, not 400)
+            raise RuntimeError(f"evaluation failed: {type(error).__name__}: {error}") from error
+
+    def metrics(self):
+        uptime = time.monotonic() - self.started
+        latency = self.latency.quantiles
+        lookups = self.counts["cache_hits"] + self.counts["cache_misses"] + self.counts["in_flight_hits"]
+        return {
+            **self.counts,
+            "uptime_s": uptime,
+            "throughput_rps": self.counts["requests"] / uptime if uptime else 0.0,
+            "latency_ms": {"mean": self.latency.moments.mean, "p50": latency.quantile(0.5), "p90": latency.quantile(0.9),
+                           "p99": latency.quantile(0.99), "max": self.latency.moments.max} if self.latency.moments.n else {},
+            "batch_size": {"mean": self.batch_sizes.moments.mean, "max": self.batch_sizes.moments.max} if self.batch_sizes.moments.n else {},
+            "cache_hit_rate": self.counts["cache_hits"] / lookups if lookups else 0.0,
+            "cache_entries": len(self.cache),
+            "best_play_cache": memo.cache().stats() if memo.cache() else None,
+        }
+
+    async def _route(self, method, path, body):
+        if path == "/advise":
+            if method != "POST":
+                return 405, {"error": "POST a JSON position to /advise"}
+            start = time.perf_counter()
+            self.counts["requests"] += 1
+            try:
+                answer = await self.advise(json.loads(body or b"{}"))
+            except (KeyError, TypeError, ValueError) as error:
+                self.counts["errors"] += 1
+                return 400, {"error": str(error) if not isinstance(error, KeyError) else f"missing field {error}"}
+            except Exception as error:
+                self.counts["errors"] += 1
+                return 500, {"error": f"{type(error).__name__}: {error}"}
+            self.latency.update((time.perf_counter() - start) * 1000)
+            return 200, answer
+        if path == "/metrics":
+            return 200, self.metrics()
+        if path == "/health":
+            return 200, {"ok": True}
+        return 404, {"error": f"no route {path}"}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+def serve(host="127.0.0.1", port=8765, max_batch=8, max_wait_ms=5.0):
+    async def main():
+        service = await AdviceService(host, port, max_batch, max_wait_ms).start()
+        print(f"Advice service listening on http://{service.address[0]}:{service.address[1]}")
+        await service.serve_forever()
+    asyncio.run(main())
+
+# Load generator
+
+def random_position(rng, rollouts=100):
+    """A random mid-game /advise request"""
+    cards = rng.sample(list(CARD_CODES), 52)
+    plays, discards = rng.randint(1, 4), rng.randint(0, 4)
+    # Up to 5 cards drawn for every action already taken
+    used = rng.randint(0, 5 * (8 - plays - discards))
+    return {"hand": cards[:8], "deck": cards[8:52 - used], "plays": plays, "discards": discards,
+            "score": rng.randint(0, 150 * (4 - plays)), "rollouts": rollouts}
+
+async def _request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def load_test(host, port, requests=500, concurrency=32, distinct=100, rollouts=100, seed=0):
+    """
+    Sends requests from concurrency keep-alive connections, drawn from distinct random positions
+    (so repeated positions exercise the cache), and reports client-side latency and throughput
+    together with the server's /metrics
+    """
+    rng = random.Random(seed)
+    positions = [random_position(rng, rollouts) for _ in range(distinct)]
+    bodies = [rng.choice(positions) for _ in range(requests)]
+    latency = MetricSketch()
+    failures = 0
+
+    async def client(worker):
+        nonlocal failures
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for body in bodies[worker::concurrency]:
+                start = time.perf_counter()
+                status, _ = await _request(reader, writer, "POST", "/advise", body)
+                latency.update((time.perf_counter() - start) * 1000)
+                failures += status != 200
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(worker) for worker in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_metrics = await _request(reader, writer, "GET", "/metrics")
+    writer.close()
+    await writer.wait_closed()
+    return {"requests": requests, "failures": failures, "seconds": elapsed, "throughput_rps": requests / elapsed,
+            "latency_ms": {"p50": latency.quantiles.quantile(0.5), "p90": latency.quantiles.quantile(0.9),
+                           "p99": latency.quantiles.quantile(0.99), "max": latency.moments.max},
+            "server": server_metrics}
+
+def run_load_test(host=None, port=8765, local=False, **options):
+    """Runs load_test against a server, or against one started in this process if local is set"""
+    async def main():
+        if local:
+            service = await AdviceService(port=0).start()
+            try:
+                return await load_test(*service.address, **options)
+            finally:
+                await service.close()
+        return await load_test(host, port, **options)
+    return asyncio.run(main())
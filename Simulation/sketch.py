@@ -0,0 +1,249 @@
+import math
+import random
+
+# Streaming summaries for simulation metrics.
+# Every sketch here can be updated one value at a time and merged with another sketch
+# of the same kind, so workers can summarize their own games and the runner only has
+# to combine a handful of small objects instead of holding every game in memory.
+
+class Moments:
+    """Running count, mean, variance, min and max (Welford, with Chan's merge)"""
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        # Sample variance, to match pandas' DataFrame.std()
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        moments.n = data["n"]
+        moments.mean = data["mean"]
+        moments.m2 = data["m2"]
+        moments.min = data["min"] if data["n"] else math.inf
+        moments.max = data["max"] if data["n"] else -math.inf
+        return moments
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (Karnin, Lang and Liberty).
+    Keeps O(k) items no matter how many values are added; rank error is roughly 1.7 / k.
+    """
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+        # Own generator so compaction never touches the global random state used by the games
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _retained(self):
+        return sum(len(c) for c in self.compactors)
+
+    def _max_retained(self):
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        while self._retained() >= self._max_retained():
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 >= len(self.compactors):
+                        self.compactors.append([])
+                    items.sort()
+                    # An odd item out stays at this level
+                    leftover = [items.pop()] if len(items) % 2 else []
+                    offset = self._rng.random() < 0.5
+                    self.compactors[level + 1].extend(items[offset::2])
+                    self.compactors[level] = leftover
+                    break
+
+    def update(self, x):
+        self.n += 1
+        self.compactors[0].append(x)
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self._compress()
+        return self
+
+    def weighted_items(self):
+        """Returns sorted (value, weight) pairs; the weights sum to n"""
+        items = [(x, 1 << level) for level, c in enumerate(self.compactors) for x in c]
+        items.sort(key=lambda item: item[0])
+        return items
+
+    def quantile(self, q):
+        """Approximate q-quantile, interpolated like numpy's default (linear) method"""
+        items = self.weighted_items()
+        if not items:
+            return math.nan
+        total = sum(w for _, w in items)
+        # Each retained item stands for `w` consecutive order statistics
+        target = q * (total - 1)
+        seen = 0
+        prev = items[0][0]
+        for x, w in items:
+            if seen + w - 1 >= target:
+                if target < seen:
+                    # target falls between the previous item and this one
+                    return prev + (x - prev) * (target - (seen - 1))
+                return x
+            seen += w
+            prev = x
+        return items[-1][0]
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.n = data["n"]
+        sketch.compactors = [list(c) for c in data["compactors"]] or [[]]
+        return sketch
+
+
+class MetricSketch:
+    """Moments and quantiles of a single metric"""
+    def __init__(self, k=200):
+        self.moments = Moments()
+        self.quantiles = KLLSketch(k)
+
+    def update(self, x):
+        self.moments.update(x)
+        self.quantiles.update(x)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        return self
+
+    def boxplot_stats(self, whis=1.5, label=None):
+        """Statistics in the format expected by matplotlib's Axes.bxp"""
+        q1, med, q3 = self.quantiles.quantiles([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        low_limit, high_limit = q1 - whis * iqr, q3 + whis * iqr
+        # Whiskers reach the most extreme observed values inside the limits
+        items = [x for x, _ in self.quantiles.weighted_items()] + [self.moments.min, self.moments.max]
+        inside = [x for x in items if low_limit <= x <= high_limit]
+        whislo = min(inside, default=q1)
+        whishi = max(inside, default=q3)
+        fliers = sorted(set(x for x in items if x < whislo or x > whishi))
+        return {
+            "label": label,
+            "mean": self.moments.mean,
+            "med": med,
+            "q1": q1,
+            "q3": q3,
+            "whislo": whislo,
+            "whishi": whishi,
+            "fliers": fliers,
+        }
+
+    def summary(self):
+        q1, med, q3 = self.quantiles.quantiles([0.25, 0.5, 0.75])
+        return {
+            "count": self.moments.n,
+            "mean": self.moments.mean,
+            "std": self.moments.std,
+            "min": self.moments.min,
+            "25%": q1,
+            "50%": med,
+            "75%": q3,
+            "max": self.moments.max,
+        }
+
+    def to_dict(self):
+        return {"moments": self.moments.to_dict(), "quantiles": self.quantiles.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.moments = Moments.from_dict(data["moments"])
+        sketch.quantiles = KLLSketch.from_dict(data["quantiles"])
+        return sketch
+
+
+class StrategySketch:
+    """One MetricSketch per metric for a single strategy"""
+    def __init__(self, strategy, metrics):
+        self.strategy = strategy
+        self.metrics = {metric: MetricSketch() for metric in metrics}
+
+    @property
+    def games(self):
+        return max((s.moments.n for s in self.metrics.values()), default=0)
+
+    def update(self, row):
+        for metric, sketch in self.metrics.items():
+            sketch.update(row[metric])
+
+    def merge(self, other):
+        for metric, sketch in other.metrics.items():
+            if metric in self.metrics:
+                self.metrics[metric].merge(sketch)
+            else:
+                self.metrics[metric] = sketch
+        return self
+
+    def to_dict(self):
+        return {"strategy": self.strategy,
+                "metrics": {metric: sketch.to_dict() for metric, sketch in self.metrics.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["strategy"], [])
+        sketch.metrics = {metric: MetricSketch.from_dict(d) for metric, d in data["metrics"].items()}
+        return sketch
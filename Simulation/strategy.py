@@ -1,7 +1,16 @@
-from player import Player
-from card import Card
-from deck import Deck
+try:
+    from . import memo
+    from .player import Player
+    from .card import Card
+    from .deck import Deck
+except ImportError: # running from inside the Simulation folder
+    import memo
+    from player import Player
+    from card import Card
+    from deck import Deck
 import itertools
+import random
+import time
 
 # Helper functions to check the deck and hand for suits and ranks for better strategy
 def checkdeckforsuits(deck: Deck) -> dict:
@@ -55,6 +64,8 @@ class Strategy:
         Fallback strategy for when no other strategy is applicable
         Returns indices of cards to play
         """
+        if memo.cache() is not None and len(player.hand) >= 5:
+            return memo.best_play(player)[2] or []
         best_indices = []
         best_score = 0
         for i in range(len(player.hand)):
@@ -69,9 +80,17 @@ class Strategy:
         return best_indices
 
 class FlushStrategy(Strategy):
-    """Prioritizes flush hands"""
-    def __init__(self):
+    """
+    Prioritizes flush hands
+    max_discard: most cards discarded at once
+    keep_threshold: a lone leading suit is kept if hand + deck hold at least this many cards of it
+    tie_break_by_deck: between suits tied in hand, keep the one with the most cards left in the deck
+    """
+    def __init__(self, max_discard=5, keep_threshold=5, tie_break_by_deck=True):
         super().__init__("Flush", ["Straight", "Straight Flush", "Flush", "Full House", "Four of a Kind"])
+        self.max_discard = max_discard
+        self.keep_threshold = keep_threshold
+        self.tie_break_by_deck = tie_break_by_deck
     
     def select_play_cards(self, player):
         # Get suits in hand
@@ -111,26 +130,32 @@ class FlushStrategy(Strategy):
             # Check the deck for the suit with the least cards
             deck_suits = checkdeckforsuits(player.deck)
             deckcounts = [(suit, deck_suits.get(suit, 0)) for suit in suits_to_consider]
-            deckcounts.sort(key=lambda x: x[1], reverse=True) # sorts by most cards in deck
+            if self.tie_break_by_deck:
+                deckcounts.sort(key=lambda x: x[1], reverse=True) # sorts by most cards in deck
             suit_to_keep = deckcounts[0][0] # keep the suit with the most cards in the deck
         else:
             suit_maybe_keep = ordered_suits[0][0] 
             deck_suits = checkdeckforsuits(player.deck)
-            if deck_suits.get(suit_maybe_keep, 0) + suits.get(suit_maybe_keep, 0) >= 5:
+            if deck_suits.get(suit_maybe_keep, 0) + suits.get(suit_maybe_keep, 0) >= self.keep_threshold:
                 suit_to_keep = suit_maybe_keep
             else:
                 suit_to_keep =  ordered_suits[1][0]
         cards_to_discard = [(i, card) for i, card in enumerate(player.hand) if card.suit != suit_to_keep]
         cards_to_discard.sort(key=lambda x: x[1].chips, reverse=False) # discards lowest value cards
-        if len(cards_to_discard) > 5:
-            return [i for i, _ in cards_to_discard[:5]]
+        if len(cards_to_discard) > self.max_discard:
+            return [i for i, _ in cards_to_discard[:self.max_discard]]
         else:
             return [i for i, _ in cards_to_discard]
 
 class StraightStrategy(Strategy):
-    """Prioritizes straight hands"""
-    def __init__(self):
+    """
+    Prioritizes straight hands
+    min_discard, max_discard: range of discard sizes searched for the best cards to hold
+    """
+    def __init__(self, min_discard=4, max_discard=5):
         super().__init__("Straight", ["Straight", "Straight Flush", "Flush", "Full House", "Four of a Kind"])
+        self.min_discard = min_discard
+        self.max_discard = max_discard
     
     def select_play_cards(self, player):
         # Get all ranks in hand
@@ -271,7 +296,7 @@ class StraightStrategy(Strategy):
         H = len(player.hand)
         
         # Iterate over combination of cards to hold
-        for d in range(4, 5 + 1):  # discard 4-5 cards, hold hands must not be bigger than 5, since then the hand will already be a straight
+        for d in range(self.min_discard, self.max_discard + 1):  # discard 4-5 cards by default, hold hands must not be bigger than 5, since then the hand will already be a straight
             for hold_indices in itertools.combinations(range(H), H-d): # iterating over all possible combinations
                 hold_hands = [player.hand[i] for i in hold_indices] # [card1, card2, card3, ...]
                 hand_prob = straight_probability(hold_hands, deck_ranks, d, verbose=self.verbose)
@@ -289,9 +314,22 @@ class StraightStrategy(Strategy):
         return cards_to_discard
 
 class FullHouse4CardsStrategy(Strategy):
-    """Prioritizes full house hands"""
-    def __init__(self):
+    """
+    Prioritizes full house hands
+    rank_first: break ties between ranks by rank before copies left in the deck
+    keep_kicker: with a single pair, also keep the best other card
+    singles_to_keep: without pairs, how many single cards to keep
+    """
+    def __init__(self, rank_first=False, keep_kicker=True, singles_to_keep=2):
         super().__init__("Full House 4 Cards", ["Full House", "Four of a Kind", "Straight", "Straight Flush", "Flush"])
+        self.rank_first = rank_first
+        self.keep_kicker = keep_kicker
+        self.singles_to_keep = singles_to_keep
+    
+    def _tie_break(self, rank_count):
+        # Sort key for (rank, copies in deck) pairs, best first when sorted in reverse
+        rank, count = rank_count
+        return (rank, count) if self.rank_first else (count, rank)
     
     def select_play_cards(self, player):
         ranks = checkhandforranks(player.hand)
@@ -362,6 +400,8 @@ class FullHouse4CardsStrategy(Strategy):
             
             # Get the highest rank among those with the most copies
             best_rank = max(possible_pair_ranks)
+            if self.rank_first:
+                best_rank = max(rank for rank in ranks if rank != three_of_a_kind)
             
             # Keep the three of a kind and the best potential pair card
             return [i for i, card in enumerate(player.hand) 
@@ -371,7 +411,7 @@ class FullHouse4CardsStrategy(Strategy):
         elif len(pairs) >= 2:
             # Sort pairs by the number of copies in the deck (descending)
             pairs_with_counts = [(rank, deck_ranks.get(rank, 0)) for rank in pairs]
-            pairs_with_counts.sort(key=lambda x: (x[1], x[0]), reverse=True)
+            pairs_with_counts.sort(key=self._tie_break, reverse=True)
             
             # Keep the two best pairs
             pairs_to_keep = [pair[0] for pair in pairs_with_counts[:2]]
@@ -391,11 +431,11 @@ class FullHouse4CardsStrategy(Strategy):
                     remaining_cards.append((rank, deck_ranks.get(rank, 0)))
             
             # Sort by count in deck (descending), then by rank (descending) for ties
-            remaining_cards.sort(key=lambda x: (x[1], x[0]), reverse=True)
+            remaining_cards.sort(key=self._tie_break, reverse=True)
             
             # Keep the pair and the best remaining card
             ranks_to_keep = [pair_rank]
-            if remaining_cards:
+            if remaining_cards and self.keep_kicker:
                 ranks_to_keep.append(remaining_cards[0][0])
             
             # Discard cards that aren't in ranks_to_keep
@@ -408,13 +448,145 @@ class FullHouse4CardsStrategy(Strategy):
             cards_with_deck_counts = [(rank, deck_ranks.get(rank, 0)) for rank in ranks.keys()]
             
             # Sort by count in deck (descending), then by rank (descending) for ties
-            cards_with_deck_counts.sort(key=lambda x: (x[1], x[0]), reverse=True)
+            cards_with_deck_counts.sort(key=self._tie_break, reverse=True)
             
             # Keep the two cards with highest counts in the deck
-            ranks_to_keep = [card[0] for card in cards_with_deck_counts[:2]]
+            ranks_to_keep = [card[0] for card in cards_with_deck_counts[:self.singles_to_keep]]
             
             # Discard cards that aren't in ranks_to_keep
             return [i for i, card in enumerate(player.hand) 
                    if card.rank not in ranks_to_keep]
         
-        
\ No newline at end of file
+        
+class RolloutStrategy(Strategy):
+    """
+    Monte Carlo lookahead: at every decision, plays each candidate action out on sampled
+    orders of the remaining deck with a base strategy, and picks the action that wins most often.
+    Candidate actions are the best 5-card play and whatever the candidate strategies would do.
+    All candidates are scored on the same sampled deck orders (common random numbers), and
+    sampling stops early once one action is clearly better than every other one.
+    The sampled orders are seeded from the position and `seed`, so seeded games replay exactly.
+    """
+    def __init__(self, base=None, candidates=None, rollouts=200, time_ms=None, min_rollouts=30,
+                 z=2.5, target=None, seed=None):
+        # An empty target_hand makes StrategicPlayer consult this strategy for every decision
+        super().__init__("Rollout", [])
+        # Imported here because kernel imports strategicPlayer, which imports this module
+        try:
+            from .kernel import GameKernel
+            from .player import TARGET_SCORE
+        except ImportError: # running from inside the Simulation folder
+            from kernel import GameKernel
+            from player import TARGET_SCORE
+        self.base = base or FlushStrategy()
+        self.candidates = candidates if candidates is not None else [FlushStrategy(), StraightStrategy(), FullHouse4CardsStrategy()]
+        self.rollouts = rollouts # maximum rollouts per candidate and decision
+        self.time_ms = time_ms # optional wall-clock budget per decision
+        self.min_rollouts = min_rollouts
+        self.z = z # how many standard errors a win-rate difference needs to count as clear
+        self.target = target if target is not None else TARGET_SCORE
+        self.seed = seed
+        self.rng = random.Random() # own generator, so rollouts never move the game's random state
+        self.kernel = GameKernel(self.base)
+        self._pending = None # play chosen while being asked for a discard
+
+    def _reseed(self, player):
+        """
+        Seeds the rollouts from the position (deck order included) and the strategy's seed, so a
+        decision is the same whichever process, chunk or earlier games came before it
+        """
+        cards = ",".join(f"{card.rank}{card.suit[0]}" if card else "-" for card in player.hand + player.deck.cards)
+        self.rng.seed(f"{self.seed}:{player.playsRemaining}:{player.discardsRemaining}:{player.currentScore}:{cards}")
+
+    def _state_key(self, player):
+        return (id(player), tuple(id(card) for card in player.hand), player.playsRemaining, player.discardsRemaining)
+
+    def _candidate_actions(self, player):
+        actions = []
+        seen = set()
+
+        def add(kind, indices):
+            if indices and (kind, frozenset(indices)) not in seen:
+                seen.add((kind, frozenset(indices)))
+                actions.append((kind, list(indices)))
+
+        if player.playsRemaining > 0 and memo.cache() is not None and len(player.hand) >= 5:
+            add("play", memo.best_play(player)[2])
+        elif player.playsRemaining > 0:
+            best_score, best_indices = 0, None
+            for indices in itertools.combinations(range(len(player.hand)), min(5, len(player.hand))):
+                _, score = player.checkScore([player.hand[i] for i in indices])
+                if score > best_score:
+                    best_score, best_indices = score, indices
+            add("play", best_indices)
+        for strategy in [self.base] + self.candidates:
+            if player.discardsRemaining > 0:
+                add("discard", strategy.select_discard_cards(player))
+            if player.playsRemaining > 0:
+                add("play", strategy.select_play_cards(player))
+        return actions
+
+    def _rollout(self, player, action, deck_order):
+        kernel = self.kernel
+        kernel.load(player.hand, deck_order, player.playsRemaining, player.discardsRemaining, player.currentScore, self.base,
+                    getattr(player, "scoring", None))
+        kernel.apply(action)
+        return kernel.finish(self.target) >= self.target
+
+    def _decide(self, player):
+        actions = self._candidate_actions(player)
+        if len(actions) <= 1:
+            return actions[0] if actions else None
+
+        start = time.perf_counter()
+        alive = list(range(len(actions)))
+        results = [[] for _ in actions] # win (1) or loss (0) of each rollout, aligned across actions
+        deck_order = list(player.deck.cards)
+        self._reseed(player)
+        for n in range(1, self.rollouts + 1):
+            self.rng.shuffle(deck_order)
+            for a in alive:
+                results[a].append(1 if self._rollout(player, actions[a], deck_order) else 0)
+
+            if n >= self.min_rollouts:
+                # Drop actions that are clearly worse than the current leader on the shared deck orders
+                leader = max(alive, key=lambda a: sum(results[a]))
+                alive = [a for a in alive if a == leader or not self._clearly_better(results[leader], results[a])]
+                if len(alive) == 1:
+                    break
+            if self.time_ms is not None and (time.perf_counter() - start) * 1000 >= self.time_ms:
+                break
+
+        best = max(alive, key=lambda a: sum(results[a]) / len(results[a]))
+        if self.verbose:
+            rates = ", ".join(f"{actions[a][0]} {actions[a][1]}: {sum(results[a]) / len(results[a]):.3f}" for a in alive)
+            print(f"Rollouts: {rates}")
+        return actions[best]
+
+    def _clearly_better(self, wins_a, wins_b):
+        """Paired test on the rollouts both actions share"""
+        n = min(len(wins_a), len(wins_b))
+        diffs = [wins_a[i] - wins_b[i] for i in range(n)]
+        mean = sum(diffs) / n
+        var = sum((d - mean) ** 2 for d in diffs) / (n - 1)
+        if var == 0:
+            return mean > 0
+        return mean - self.z * (var / n) ** 0.5 > 0
+
+    def select_discard_cards(self, player):
+        action = self._decide(player)
+        if action is None:
+            return []
+        if action[0] == "play":
+            # StrategicPlayer asks for a play next when no discard is returned
+            self._pending = (self._state_key(player), action[1])
+            return []
+        return action[1]
+
+    def select_play_cards(self, player):
+        if self._pending is not None and self._pending[0] == self._state_key(player):
+            indices = self._pending[1]
+            self._pending = None
+            return indices
+        action = self._decide(player)
+        return action[1] if action else None
@@ -0,0 +1,125 @@
+import itertools
+import math
+import os
+import random
+
+try:
+    from .player import TARGET_SCORE
+    from .runner import STRATEGIES
+    from .strategicPlayer import StrategicPlayer
+except ImportError: # running from inside the Simulation folder
+    from player import TARGET_SCORE
+    from runner import STRATEGIES
+    from strategicPlayer import StrategicPlayer
+
+# Parameter tuning for the heuristic strategies.
+# Candidates are raced with successive halving: every round plays all surviving candidates on
+# the same new block of seeds (so they are compared on identical deals), then keeps the best
+# 1/eta of them and drops any candidate whose win-rate interval lies below the leader's.
+# Later rounds use larger blocks, so most games are spent on the promising candidates.
+
+# Values tried for each constructor parameter; the defaults reproduce the original strategies
+PARAM_SPACES = {
+    "flush": {
+        "max_discard": [3, 4, 5],
+        "keep_threshold": [4, 5, 6, 7],
+        "tie_break_by_deck": [True, False],
+    },
+    "straight": {
+        "min_discard": [2, 3, 4],
+        "max_discard": [4, 5],
+    },
+    "full_house": {
+        "rank_first": [False, True],
+        "keep_kicker": [True, False],
+        "singles_to_keep": [1, 2, 3],
+    },
+}
+
+def _valid(params):
+    return params.get("min_discard", 0) <= params.get("max_discard", math.inf)
+
+def grid_candidates(space):
+    names = sorted(space)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    return [params for params in candidates if _valid(params)]
+
+def random_candidates(space, n, seed=0):
+    """n distinct random points of the grid (all of them if the grid is smaller)"""
+    candidates = grid_candidates(space)
+    return random.Random(seed).sample(candidates, min(n, len(candidates)))
+
+def wilson_interval(wins, games, z=1.96):
+    """Confidence interval for a win rate; well behaved near 0 and 1 unlike the normal approximation"""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denominator = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denominator
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+def play_block(args):
+    """Wins of one parameter set over seeds [start, stop)"""
+    key, params, start, stop, target = args
+    random.seed(start)
+    player = StrategicPlayer(STRATEGIES[key](**params))
+    wins = 0
+    for seed in range(start, stop):
+        player.reset(seed)
+        player.play_strategically()
+        wins += player.currentScore >= target
+    return wins
+
+def tune(key, candidates=None, block_size=200, rounds=4, eta=2, workers=None, chunk_size=100,
+         target=TARGET_SCORE, start_seed=0, z=1.96, progress=None):
+    """
+    Races parameter sets of a strategy and returns one result per candidate, best first:
+      {"params", "wins", "games", "win_rate", "ci_low", "ci_high", "rounds"}
+    Round r plays block_size * eta**r new seeds; progress(round, results) is called after each round.
+    """
+    candidates = candidates if candidates is not None else grid_candidates(PARAM_SPACES[key])
+    results = [{"params": params, "wins": 0, "games": 0, "rounds": 0} for params in candidates]
+    alive = list(range(len(results)))
+    workers = workers or os.cpu_count()
+    seed = start_seed
+
+    pool = None
+    if workers > 1:
+        from multiprocessing import Pool
+        pool = Pool(workers)
+    try:
+        for r in range(rounds):
+            size = block_size * eta ** r
+            jobs = [(c, (key, results[c]["params"], lo, min(lo + chunk_size, seed + size), target))
+                    for c in alive for lo in range(seed, seed + size, chunk_size)]
+            wins = pool.map(play_block, [job for _, job in jobs]) if pool else [play_block(job) for _, job in jobs]
+            for (c, job), w in zip(jobs, wins):
+                results[c]["wins"] += w
+                results[c]["games"] += job[3] - job[2]
+            for c in alive:
+                results[c]["rounds"] += 1
+            seed += size
+
+            for result in results:
+                result["win_rate"] = result["wins"] / result["games"] if result["games"] else 0.0
+                result["ci_low"], result["ci_high"] = wilson_interval(result["wins"], result["games"], z)
+            if progress:
+                progress(r, [results[c] for c in alive])
+            if r == rounds - 1:
+                break
+
+            # Racing: drop candidates that are clearly behind the leader, then keep the top 1/eta
+            alive.sort(key=lambda c: results[c]["win_rate"], reverse=True)
+            leader_low = results[alive[0]]["ci_low"]
+            alive = [c for c in alive if results[c]["ci_high"] >= leader_low]
+            alive = alive[:max(1, math.ceil(len(alive) / eta))]
+            if len(alive) == 1:
+                break
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    # Survivors (most games) first, then by win rate
+    return sorted(results, key=lambda result: (result["rounds"], result["win_rate"]), reverse=True)